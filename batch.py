@@ -0,0 +1,96 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+import numpy as np
+
+from course_gen_v3 import CourseGenerator
+
+
+def _base_seed(seeds):
+    """
+    SeedSequence to spawn per-hole seeds from. A SeedSequence passed in is copied, so spawning
+    never advances the caller's and the same object always yields the same holes.
+    """
+    if isinstance(seeds, np.random.SeedSequence):
+        return np.random.SeedSequence(seeds.entropy, spawn_key=seeds.spawn_key, pool_size=seeds.pool_size)
+    return np.random.SeedSequence(seeds)
+
+
+def hole_seeds(n: int, seeds=None):
+    """
+    One SeedSequence per hole.
+
+    `seeds` may be a single base seed (each hole gets an independent child stream spawned from it),
+    or a sequence of n per-hole seeds. Seeds are fixed up front, so hole i is the same no matter
+    which worker builds it.
+    """
+    if seeds is None or np.isscalar(seeds) or isinstance(seeds, np.random.SeedSequence):
+        return _base_seed(seeds).spawn(n)
+
+    seeds = list(seeds)
+    if len(seeds) != n:
+        raise ValueError(f"expected {n} seeds, got {len(seeds)}")
+    return [seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed) for seed in seeds]
+
+
+def build_hole(generator=CourseGenerator, seed=None, rng=None, **params):
+    """
+    Construct and fully generate one hole with any of the course generators. Every generator takes
+    a `seed` or an `rng` and makes all of its random draws from that one np.random.Generator.
+    """
+    hole = generator(seed=seed, rng=rng, **params)
+    if not isinstance(hole, CourseGenerator): # v1/v2 courses are built on demand rather than in __init__
+        hole.generate()
+    return hole
+
+
+def _build_hole(job):
+    generator, params, seed = job
+    return build_hole(generator, rng=np.random.default_rng(seed), **params)
+
+
+def generate_courses(n: int, seeds=None, workers: int = None, generator=CourseGenerator, executor=None, **params):
+    """
+    Build n holes with `generator` (CourseGenerator, course_gen_v2.Course, ...) across a process pool.
+
+    Each hole draws from its own np.random.Generator seeded from `seeds`, so the result is
+    identical for any worker count. Extra keyword arguments are passed to the generator, e.g.
+    generate_courses(1000, seeds=7, length=450). workers=1 builds everything in this process.
+    Pass an `executor` (with `workers` set to its size) to reuse one pool across many calls
+    instead of starting one per call.
+    """
+    jobs = [(generator, params, seed) for seed in hole_seeds(n, seeds)]
+    workers = workers or os.cpu_count() or 1
+
+    if executor is None and (workers == 1 or n <= 1):
+        return [_build_hole(job) for job in jobs]
+
+    chunksize = max(1, n // (workers * 4)) # keep pickling overhead low for big batches
+    if executor is not None:
+        return list(executor.map(_build_hole, jobs, chunksize=chunksize))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_build_hole, jobs, chunksize=chunksize))
+
+
+def iter_holes(seeds=None, generator=CourseGenerator, **params):
+    """
+    Yield holes one at a time, for as long as the caller keeps asking.
+
+    With a single base seed the sequence is unbounded and hole i matches hole i of
+    generate_courses(n, seeds=base); with a sequence of seeds it stops after the last one. Only the
+    hole being examined is alive, so memory stays flat. Pass lazy=True to CourseGenerator to build
+    features only when a filter looks at them, e.g.
+
+        for hole in iter_holes(7, lazy=True):
+            if hole.green.pos[1] > 10:
+                continue
+    """
+    if seeds is None or np.isscalar(seeds) or isinstance(seeds, np.random.SeedSequence):
+        base = _base_seed(seeds)
+        while True:
+            yield build_hole(generator, rng=np.random.default_rng(base.spawn(1)[0]), **params)
+
+    for seed in seeds:
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        yield build_hole(generator, rng=np.random.default_rng(seed), **params)
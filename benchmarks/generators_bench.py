@@ -0,0 +1,141 @@
+"""
+Benchmark suite for the three course generators.
+
+Every case builds holes with fixed seeds 0..n-1 and reports throughput (holes/s), p50/p99
+latency per hole and peak traced memory of a single build. Cases cover par 3/4/5 hole lengths
+for all generators, outline resolutions and hazard counts for CourseGenerator, and terrain grid
+sizes for CourseGenerator (sample spacing) and GolfCourse (fairway width).
+
+Run from the repository root:
+    python -m benchmarks.generators_bench --output bench.json
+    python -m benchmarks.generators_bench --baseline bench.json    # fails on >10% p50 regressions
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from course_gen import GolfCourse
+from course_gen_v2 import Course
+from course_gen_v3 import CourseGenerator
+
+PAR_LENGTHS = {3: 150, 4: 350, 5: 550}
+
+
+def benchmark_cases():
+    """name -> function building one hole from a seed"""
+    cases = {}
+    for par, length in PAR_LENGTHS.items():
+        cases[f'v1/par{par}'] = lambda seed, length=length: GolfCourse(length=length, seed=seed).generate()
+        cases[f'v2/par{par}'] = lambda seed, par=par: Course(par=par, seed=seed).generate()
+        cases[f'v3/par{par}'] = lambda seed, length=length: CourseGenerator(length, seed=seed)
+
+    for resolution in (50, 100, 400):
+        cases[f'v3/par4/resolution{resolution}'] = \
+            lambda seed, resolution=resolution: CourseGenerator(350, seed=seed, resolution=resolution)
+
+    for spacing in (1, 2, 4):
+        cases[f'v3/par4/terrain_spacing{spacing}'] = \
+            lambda seed, spacing=spacing: CourseGenerator(350, seed=seed, terrain_spacing=spacing)
+
+    for n_hazards in (10, 40):
+        cases[f'v3/par5/hazards{n_hazards}'] = lambda seed, n=n_hazards: \
+            CourseGenerator(550, seed=seed, n_traps=n // 2, n_water=n // 10, n_trees=n - n // 2 - n // 10)
+
+    for width in (25, 50, 100):
+        cases[f'v1/par4/width{width}'] = lambda seed, width=width: GolfCourse(length=350, width=width, seed=seed).generate()
+
+    return cases
+
+
+def run_case(build, n_holes, warmup=3):
+    for seed in range(warmup):
+        build(seed)
+
+    latencies = np.empty(n_holes)
+    start = time.perf_counter()
+    for seed in range(n_holes):
+        hole_start = time.perf_counter()
+        build(seed)
+        latencies[seed] = time.perf_counter() - hole_start
+    total = time.perf_counter() - start
+
+    # Memory is traced in a separate build so tracing overhead does not skew the timings
+    tracemalloc.start()
+    build(n_holes)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'holes': n_holes,
+        'holes_per_s': n_holes / total,
+        'p50_ms': float(np.percentile(latencies, 50) * 1e3),
+        'p99_ms': float(np.percentile(latencies, 99) * 1e3),
+        'peak_memory_kb': peak / 1024,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Print the change of every case against the baseline; returns the names that regressed"""
+    regressions = []
+    print(f"\n{'case':<32} {'p50 (ms)':>10} {'baseline':>10} {'change':>8}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        old = baseline[name]['p50_ms']
+        change = result['p50_ms'] / old - 1
+        flag = ''
+        if change > tolerance:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<32} {result['p50_ms']:>10.2f} {old:>10.2f} {change:>+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--holes', type=int, default=50, help='holes built per case')
+    parser.add_argument('--cases', nargs='*', help='only run cases whose name starts with one of these prefixes')
+    parser.add_argument('--output', help='write results as JSON to this path')
+    parser.add_argument('--baseline', help='JSON results to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='allowed p50 slowdown before failing')
+    args = parser.parse_args()
+
+    cases = benchmark_cases()
+    if args.cases:
+        cases = {name: build for name, build in cases.items() if name.startswith(tuple(args.cases))}
+
+    results = {}
+    print(f"{'case':<32} {'holes/s':>10} {'p50 (ms)':>10} {'p99 (ms)':>10} {'peak (KiB)':>11}")
+    for name, build in cases.items():
+        result = run_case(build, args.holes)
+        results[name] = result
+        print(f"{name:<32} {result['holes_per_s']:>10.1f} {result['p50_ms']:>10.2f} "
+              f"{result['p99_ms']:>10.2f} {result['peak_memory_kb']:>11.0f}")
+
+    if args.output:
+        report = {
+            'meta': {
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'machine': platform.machine(),
+                'holes': args.holes,
+            },
+            'results': results,
+        }
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)['results']
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
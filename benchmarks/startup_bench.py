@@ -0,0 +1,71 @@
+"""
+Import-time guard for the library modules.
+
+Every module is imported in a fresh interpreter, several times, and the median wall time is
+reported next to a bare `import numpy` for reference. Modules in LIGHT must not pull in any of the
+HEAVY backends (scipy, matplotlib, PIL), which only load when a hole is generated or plotted.
+
+Run from the repository root:
+    python -m benchmarks.startup_bench
+    python -m benchmarks.startup_bench --budget-ms 150    # also fail when an import is slower
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+import numpy as np
+
+# Modules headless workers use to load, query, render and serve holes
+LIGHT = ('features', 'course_io', 'cache', 'batch', 'course_gen_v3', 'spatial', 'distance', 'sim',
+         'render', 'term', 'world', 'service', 'metrics')
+HEAVY = ('scipy', 'matplotlib', 'PIL')
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = sorted(name for name in {heavy!r} if name in sys.modules)
+print(json.dumps({{'seconds': elapsed, 'heavy': heavy}}))
+"""
+
+
+def probe(module, repeat):
+    """(median import seconds, heavy modules loaded) of `module` in fresh interpreters"""
+    times = []
+    heavy = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', _PROBE.format(module=module, heavy=HEAVY)],
+                                check=True, capture_output=True, text=True).stdout
+        result = json.loads(output)
+        times.append(result['seconds'])
+        heavy = result['heavy']
+    return float(np.median(times)), heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='fresh interpreters per module')
+    parser.add_argument('--budget-ms', type=float, help='fail when a module takes longer than this to import')
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'module':<16} {'import (ms)':>12}  heavy backends loaded")
+    for module in ('numpy',) + LIGHT:
+        seconds, heavy = probe(module, args.repeat)
+        flag = ''
+        if heavy:
+            failures.append(module)
+            flag = '  FAIL'
+        elif args.budget_ms is not None and module != 'numpy' and seconds * 1e3 > args.budget_ms:
+            failures.append(module)
+            flag = '  OVER BUDGET'
+        print(f"{module:<16} {seconds * 1e3:>12.1f}  {', '.join(heavy) or '-'}{flag}")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Compare the vectorized terrain engine against the original per-cell PerlinNoise loop.
+
+Run from the repository root:
+    python -m benchmarks.terrain_bench
+"""
+import argparse
+import time
+
+import numpy as np
+
+from terrain import GradientNoise
+
+
+def legacy_terrain(grid_x, grid_z, seed, scale=100.0):
+    """The loop GolfCourse._generate_terrain used before the vectorized engine"""
+    from perlin_noise import PerlinNoise  # pip install perlin-noise
+
+    noise = PerlinNoise(4, seed)
+    heights = np.zeros((grid_z, grid_x))
+    for z in range(grid_z):
+        for x in range(grid_x):
+            heights[z, x] = noise([x/scale, z/scale]) * 10
+    return heights
+
+
+def vectorized_terrain(grid_x, grid_z, seed, scale=100.0):
+    noise = GradientNoise(frequency=4, seed=seed)
+    return noise.grid(np.arange(grid_x) / scale, np.arange(grid_z) / scale) * 10
+
+
+def best_of(fn, repeats, *args):
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', default=['400x150', '550x150', '1000x450'],
+                        help='grid sizes as LENGTHxWIDTH')
+    parser.add_argument('--seed', type=int, default=67)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--skip-legacy', action='store_true', help='only time the vectorized engine')
+    args = parser.parse_args()
+
+    print(f"{'grid':>10} {'legacy (s)':>12} {'vectorized (s)':>15} {'speedup':>9} {'max |diff|':>11}")
+    for size in args.sizes:
+        grid_x, grid_z = (int(v) for v in size.split('x'))
+        fast_time, fast = best_of(vectorized_terrain, args.repeats, grid_x, grid_z, args.seed)
+
+        if args.skip_legacy:
+            print(f"{size:>10} {'-':>12} {fast_time:>15.4f} {'-':>9} {'-':>11}")
+            continue
+
+        slow_time, slow = best_of(legacy_terrain, 1, grid_x, grid_z, args.seed)
+        diff = np.abs(slow - fast).max()
+        print(f"{size:>10} {slow_time:>12.3f} {fast_time:>15.4f} {slow_time / fast_time:>8.0f}x {diff:>11.2e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+from collections import OrderedDict
+import copy
+import hashlib
+import io
+import json
+import os
+import pickle
+import tempfile
+
+from batch import build_hole
+from course_io import CourseArchive, StoredHole, open_courses, write_courses
+from profiling import array_nbytes
+
+
+def hole_key(generator, seed, params):
+    """Content address of a hole: generator identity and version, constructor parameters and seed"""
+    description = {
+        'generator': f'{generator.__module__}.{generator.__qualname__}',
+        'version': getattr(generator, 'VERSION', 0),
+        # a profiling instrument does not change the hole
+        'params': {name: value for name, value in params.items() if name != 'instrument'},
+        'seed': seed,
+    }
+    encoded = json.dumps(description, sort_keys=True, default=repr).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _without_instrument(hole):
+    """Shallow copy of `hole` without its profiling callbacks (a StageCollector holds a lock)"""
+    if getattr(hole, 'instrument', None) is None:
+        return hole
+    hole = copy.copy(hole)
+    hole.instrument = None
+    return hole
+
+
+def _frozen(hole):
+    """A freshly built feature hole as a read-only StoredHole over an in-memory archive"""
+    buffer = io.BytesIO()
+    write_courses(buffer, [hole])
+    return CourseArchive('<memory>', buffer.getvalue())[0]
+
+
+def _handout(hole):
+    """What get() returns for a cached hole: StoredHole arrays are read-only, anything else is copied"""
+    return hole if isinstance(hole, StoredHole) else copy.deepcopy(hole)
+
+
+class CourseCache():
+    """
+    Two-level cache of generated holes.
+
+    Holes are looked up in an in-process LRU (bounded by `max_bytes` of array data), then in
+    `directory` on disk, and only generated on a miss. Holes with features (CourseGenerator) are
+    stored as single-hole course_io archives and always handed out as read-only StoredHole, a
+    fresh build included, so every lookup returns the same kind of hole and none can be edited in
+    place. Other generators are pickled, and callers get their own copy of the cached hole.
+    Keys include the generator's VERSION: bump it whenever the same parameters and seed would
+    produce a different hole, and the stale entries are retired.
+    """
+
+    def __init__(self, directory=None, max_bytes: int = 256 * 2**20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._memory = OrderedDict() # key -> (hole, nbytes), least recently used first
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, key[:2], key + suffix)
+
+
+    def _load(self, key):
+        if self.directory is None:
+            return None
+        archive_path = self._path(key, '.tgolf')
+        if os.path.exists(archive_path):
+            return open_courses(archive_path)[0]
+        pickle_path = self._path(key, '.pkl')
+        if os.path.exists(pickle_path):
+            with open(pickle_path, 'rb') as file:
+                return pickle.load(file)
+        return None
+
+
+    def _store(self, key, hole):
+        if self.directory is None:
+            return
+        os.makedirs(os.path.dirname(self._path(key, '')), exist_ok=True)
+
+        # Write to a temporary file first so concurrent readers never see a partial hole
+        suffix = '.tgolf' if hasattr(hole, 'features') else '.pkl'
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self._path(key, '')), suffix='.tmp')
+        os.close(fd)
+        try:
+            if suffix == '.tgolf':
+                write_courses(tmp_path, [hole])
+            else:
+                with open(tmp_path, 'wb') as file:
+                    pickle.dump(_without_instrument(hole), file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key, suffix))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+
+    def _remember(self, key, hole):
+        nbytes = array_nbytes(hole)
+        if nbytes > self.max_bytes:
+            return
+        self._memory[key] = (hole, nbytes)
+        self.nbytes += nbytes
+        while self.nbytes > self.max_bytes:
+            _, (_, evicted_nbytes) = self._memory.popitem(last=False)
+            self.nbytes -= evicted_nbytes
+
+
+    def get(self, generator, seed, **params):
+        """
+        Cached hole for generator(seed=seed, **params), generating and storing it on a miss. With
+        seed=None every call asks for a new random hole, so it is built and never cached.
+        """
+        if seed is None:
+            self.misses += 1
+            hole = build_hole(generator, seed=seed, **params)
+            return _frozen(hole) if hasattr(hole, 'features') else hole
+        key = hole_key(generator, seed, params)
+
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return _handout(self._memory[key][0])
+
+        hole = self._load(key)
+        if hole is not None:
+            self.disk_hits += 1
+            self._remember(key, hole)
+            return _handout(hole)
+
+        self.misses += 1
+        built = build_hole(generator, seed=seed, **params)
+        self._store(key, built)
+        if hasattr(built, 'features'):
+            # the stored archive when there is one, so the hole stays memory-mapped
+            hole = self._load(key) if self.directory is not None else _frozen(built)
+            self._remember(key, hole)
+            return hole
+        self._remember(key, copy.deepcopy(_without_instrument(built)))
+        return built
+
+
+    def clear(self, disk: bool = False):
+        self._memory.clear()
+        self.nbytes = 0
+        if disk and self.directory is not None:
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if name.endswith(('.tgolf', '.pkl')):
+                        os.remove(os.path.join(root, name))
@@ -1,15 +1,28 @@
 import numpy as np
-from scipy.interpolate import CubicSpline
-from perlin_noise import PerlinNoise  # pip install perlin-noise
-import time
-from PIL import Image
+from terrain import GradientNoise, HeightField
+from lie import OUT, ROUGH, FAIRWAY
+from profiling import count_fits, run_stage, print_stage
+from render import shade_heights
+
+
+# scipy is only imported once a course is actually generated, PIL only by the visualizers
+@count_fits
+def _cubic_spline(*args, **kwargs):
+    from scipy.interpolate import CubicSpline
+    return CubicSpline(*args, **kwargs)
+
 
 class GolfCourse:
-    def __init__(self, length=400, width=50, bends=0, bottlenecks=0):
+    VERSION = 1
+
+    def __init__(self, length=400, width=50, bends=0, bottlenecks=0, seed=None, rng=None, instrument=None):
         self.length = length # Length of course
         self.width = width # Width of fairway
         self.bends = bends # How many curves the fairway has
         self.bottlenecks = bottlenecks # How many bottlenecks the fairway has
+        self.seed = seed
+        self.rng = rng if rng is not None else np.random.default_rng(seed)
+        self.instrument = instrument
 
         # Grid dimensions
         self.grid_x = length
@@ -17,6 +30,7 @@ class GolfCourse:
         
         # Heightmap (y-values at each x,z position)
         self.heights = np.zeros((self.grid_z, self.grid_x))
+        self.height_field = None
         
         # Centerline of fairway
         self.centerline = None
@@ -25,14 +39,14 @@ class GolfCourse:
     def _generate_centerline(self):
         """Create curved fairway path"""    
         x_points = np.linspace(0, self.length, self.bends + 2) # x positions where bends occur
-        z_points = np.random.randn(self.bends + 2) * 20 + (self.grid_z // 2) # z positions at the apex of bends
+        z_points = self.rng.standard_normal(self.bends + 2) * 20 + (self.grid_z // 2) # z positions at the apex of bends
 
         # Start and end centerline in the middle of the course
         z_points[0] = self.grid_z // 2  
         z_points[-1] = self.grid_z // 2 
         
         # Smooth with cubic spline (lerp on crack)
-        spline = CubicSpline(x_points, z_points)
+        spline = _cubic_spline(x_points, z_points)
         
         # Get center line position every one yard
         x_samples = np.arange(0, self.length)
@@ -40,6 +54,7 @@ class GolfCourse:
         
         # Store centerline z pos with respective x pos
         self.centerline = np.column_stack([x_samples, z_samples])
+        return self.centerline
         
     def _define_fairway(self):
         """Define fairway width along the centerline"""
@@ -49,53 +64,45 @@ class GolfCourse:
         # self.fairway_width = np.ones(num_points) * self.width
 
         x_points = np.linspace(0, self.length, self.bottlenecks + 3)
-        widths = np.abs(self.width - np.random.randn(self.bottlenecks + 3) * (self.width // 4)) # width of the bottleneck
+        widths = np.abs(self.width - self.rng.standard_normal(self.bottlenecks + 3) * (self.width // 4)) # width of the bottleneck
 
         #start and end fairway with width of 0, middle max width
         widths[0] = 20
         widths[-1] = 20
-        widths[len(widths) // 2] = course.width
+        widths[len(widths) // 2] = self.width
 
-        spline = CubicSpline(x_points, widths)
+        spline = _cubic_spline(x_points, widths)
 
         x_samples = np.arange(0, self.length)
         widths = spline(x_samples)
 
         self.fairway_width = np.column_stack([x_samples, widths])
+        return self.fairway_width
         
     def _generate_terrain(self, seed):
         """Generate height values using Perlin noise"""
-        # Create noise generator with octaves for detail
-        noise = PerlinNoise(4, seed)
+        # Same lattice and seeding as PerlinNoise(4, seed), evaluated for the whole grid at once
+        noise = GradientNoise(frequency=4, seed=seed)
         
         scale = 100.0  # larger = smoother terrain
         
-        for z in range(self.grid_z):
-            for x in range(self.grid_x):
-                # Generate noise value (returns values roughly in [-0.5, 0.5])
-                height = noise([x/scale, z/scale])
-                self.heights[z, x] = height * 10  # scale to meters
+        # Generate noise values (roughly in [-0.5, 0.5])
+        xs = np.arange(self.grid_x) / scale
+        zs = np.arange(self.grid_z) / scale
+        self.heights = noise.grid(xs, zs) * 10  # scale to meters
+        self.height_field = HeightField(self.heights)
+        return self.heights
                 
     def generate(self, seed=None):
-        np.random.seed = seed
-        start_time = time.time()
-
-        task_time = time.time()
-        print('Generating centerline...')
-        self._generate_centerline()
-        print(f'Task completed in {time.time()-task_time} seconds!') 
-
-        task_time = time.time()
-        print('Generating fairway bounds...')        
-        self._define_fairway()
-        print(f'Task completed in {time.time()-task_time} seconds!') 
-        
-        task_time = time.time()
-        print('Generating terrain height...')        
-        self._generate_terrain(seed)
-        print(f'Task completed in {time.time()-task_time} seconds!') 
-        
-        print(f'Course complete! Total generation time: {time.time()-start_time} seconds!')
+        if seed is not None:
+            self.seed = seed
+            self.rng = np.random.default_rng(seed)
+        # Terrain keeps the PerlinNoise seed semantics, so it takes an int seed rather than the generator
+        terrain_seed = self.seed if self.seed is not None else int(self.rng.integers(1, 10**5))
+
+        run_stage(self.instrument, self, 'centerline', self._generate_centerline)
+        run_stage(self.instrument, self, 'fairway', self._define_fairway)
+        run_stage(self.instrument, self, 'terrain', self._generate_terrain, terrain_seed)
 
     def get_height(self, x, z):
         """Get terrain height at world position (x, z)"""
@@ -115,6 +122,26 @@ class GolfCourse:
         
         return dx, dz
     
+    def sample_height(self, xs, zs, order=1):
+        """Interpolated terrain height at fractional positions (bilinear, or bicubic with order=3)"""
+        return self.height_field.sample(xs, zs, order)
+
+    def sample_gradient(self, xs, zs, order=1):
+        """Interpolated terrain gradient (dx, dz) at fractional positions"""
+        return self.height_field.gradient(xs, zs, order)
+    
+    def lie_at(self, xs, zs):
+        """Lie code(s) at (x, z) positions: fairway within the fairway width, rough elsewhere on the grid"""
+        scalar = np.ndim(xs) == 0 and np.ndim(zs) == 0
+        xs, zs = np.broadcast_arrays(np.asarray(xs, dtype=float), np.asarray(zs, dtype=float))
+        ix = np.clip(np.floor(xs).astype(np.int64), 0, self.grid_x - 1)
+
+        distance = np.abs(zs - self.centerline[ix, 1])
+        lies = np.where(distance < self.fairway_width[ix, 1] / 2, FAIRWAY, ROUGH).astype(np.uint8)
+        lies[(xs < 0) | (xs >= self.grid_x) | (zs < 0) | (zs >= self.grid_z)] = OUT
+
+        return int(lies) if scalar else lies
+    
     def is_on_fairway(self, x, z):
         """Check if position is on fairway vs rough"""
         # Find nearest centerline point
@@ -128,49 +155,40 @@ class GolfCourse:
         distance = abs(z - center_z)
         return distance < width / 2
 
-# Usage example
-course = GolfCourse(bends=2, bottlenecks=0) 
-course.generate(seed=67)  # Use seed for reproducible courses
-
-# Physics calculations
-ball_x, ball_z = 150, 75
-height = course.get_height(ball_x, ball_z)
-slope_x, slope_z = course.get_slope(ball_x, ball_z)
-on_fairway = course.is_on_fairway(ball_x, ball_z)
-
-print(f"Height: {height:.2f}y")
-print(f"Slope: ({slope_x:.3f}, {slope_z:.3f})")
-print(f"On fairway: {on_fairway}")
-
 def height_map_visualizer(course):
     """Height Map Visualization"""
-    height_image = []
-    for row in course.heights:
-        row_list = []
-        for cell in row:
-            if cell >=0:
-                row_list.append((0, cell*50, 0))
-            else:
-                row_list.append((abs(cell)*50, 0, 0))
-        height_image.append(row_list)
-
-    arr_np = np.array(height_image, dtype=np.uint8)
-    Image.fromarray(arr_np, mode='RGB').show()
+    from PIL import Image
+    Image.fromarray(shade_heights(course.heights), mode='RGB').show()
 
 def fairway_visualizer(course):
     """Fairway Visualization"""
-    fairway_bounds = []
-    for z in range(course.grid_z-1):
-        row = []
-        for x in range(course.grid_x-1):
-            if course.is_on_fairway(x, z):
-                row.append((0, 200, 50))
-            else:
-                row.append((0, 0, 0))
-        fairway_bounds.append(row)
-        
-    arr_np = np.array(fairway_bounds, dtype=np.uint8)
-    Image.fromarray(arr_np, mode='RGB').show()
+    from PIL import Image
+    xs = np.arange(course.grid_x - 1)
+    zs = np.arange(course.grid_z - 1)
+    on_fairway = course.lie_at(xs[np.newaxis, :], zs[:, np.newaxis]) == FAIRWAY
+
+    fairway_bounds = np.zeros(on_fairway.shape + (3,), dtype=np.uint8)
+    fairway_bounds[on_fairway] = (0, 200, 50)
+    Image.fromarray(fairway_bounds, mode='RGB').show()
+
+def main():
+    # Usage example
+    course = GolfCourse(bends=2, bottlenecks=0, instrument=print_stage) 
+    course.generate(seed=67)  # Use seed for reproducible courses
+
+    # Physics calculations
+    ball_x, ball_z = 150, 75
+    height = course.get_height(ball_x, ball_z)
+    slope_x, slope_z = course.get_slope(ball_x, ball_z)
+    on_fairway = course.is_on_fairway(ball_x, ball_z)
+
+    print(f"Height: {height:.2f}y")
+    print(f"Slope: ({slope_x:.3f}, {slope_z:.3f})")
+    print(f"On fairway: {on_fairway}")
+
+    # height_map_visualizer(course)
+    fairway_visualizer(course)
+
 
-# height_map_visualizer(course)
-fairway_visualizer(course)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
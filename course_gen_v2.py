@@ -1,15 +1,24 @@
 import numpy as np
-from scipy.interpolate import BSpline, PchipInterpolator, splprep, splev
-import matplotlib.pyplot as plt
-from matplotlib.path import Path
+from lie import LieGrid, OUT, ROUGH, FAIRWAY, GREEN
+from profiling import count_fits, run_stage
+
+
+# scipy and matplotlib are only imported once a hole is actually generated
+@count_fits
+def _splprep(*args, **kwargs):
+    from scipy.interpolate import splprep
+    return splprep(*args, **kwargs)
 
-np.random.seed(10)
 
 class Course():
-    def __init__(self, par=4, dogleg=False, intensity=1):
+    VERSION = 1
+
+    def __init__(self, par=4, dogleg=False, intensity=1, seed=None, rng=None, instrument=None):
         self.par = par
+        self.instrument = instrument
         self.dogleg = dogleg
         self.intensity = intensity 
+        self.rng = rng if rng is not None else np.random.default_rng(seed)
 
         self.length = 0
         self.center_line = None
@@ -17,6 +26,7 @@ class Course():
         self.fairway_path = None
         self.green = [[]]
         self.green_path = None
+        self._lie_grids = {} # resolution -> LieGrid
 
 
     def _generate_length(self):
@@ -45,6 +55,7 @@ class Course():
             for i in range(1, inflection_points-1):
                 y_points[i] = bend_intensity * np.exp(-((i-bend_location)/2)**2)
 
+        from scipy.interpolate import PchipInterpolator
         center_line_function = PchipInterpolator(x_points, y_points)
         
         return center_line_function
@@ -67,19 +78,23 @@ class Course():
             center_scaler *= min_width // 2
             # offset = min_width//2 + (min_width)*np.random.uniform(low=0.0, high=2.0)*center_scaler
             # offset = abs(min_width//2 + (min_width // 2)*np.random.randn() + center_scaler)
-            offset = min_width + abs((min_width)*np.random.randn())
+            offset = min_width + abs((min_width)*self.rng.standard_normal())
             control_array[i] = offset
 
         control_array[0] = 0
         control_array[-1] = min_width
         control_array[-4] = min_width // 4
 
+        from scipy.interpolate import BSpline
         width_function = BSpline(knot_array, control_array, degree)
 
         return width_function
     
     
     def _generate_fairway_shape(self, length, center_line, top_width, bottom_width):
+        from scipy.interpolate import splev
+        from matplotlib.path import Path
+
         xx = np.linspace(0, length)
 
         top_bound = center_line(xx) + top_width(xx)
@@ -88,7 +103,7 @@ class Course():
         fairway_y = np.concatenate((top_bound, bottom_bound[-1:0:-1]))
 
         fairway_generation_resolution = np.linspace(0, 1, length)
-        fairway_tck, _ = splprep([fairway_x, fairway_y], s=0, per=True)
+        fairway_tck, _ = _splprep([fairway_x, fairway_y], s=0, per=True)
         fairway = splev(fairway_generation_resolution, fairway_tck)
         fairway_path = Path(np.column_stack([fairway[0], fairway[1]]))
 
@@ -98,7 +113,7 @@ class Course():
         rough_y = np.concatenate((rough_top_bound, rough_bottom_bound[-1:0:-1]))
 
         rough_generation_resolution = np.linspace(0, 1, length//4)
-        rough_tck, _ = splprep([rough_x, rough_y], s=0, per=True)
+        rough_tck, _ = _splprep([rough_x, rough_y], s=0, per=True)
         rough = splev(rough_generation_resolution, rough_tck)
         rough_path = Path(np.column_stack([rough[0], rough[1]]))
 
@@ -106,6 +121,9 @@ class Course():
     
     
     def _generate_green_shape(self, length, fairway):
+        from scipy.interpolate import splev
+        from matplotlib.path import Path
+
         green_length = 30
         green_inset = 2 # Distance of green from the edge of the fairway
 
@@ -122,7 +140,7 @@ class Course():
         unclosed_green = np.array([xx[1:] + green_inset*(normals_run/normals_magnitude), 
                                    yy[1:] + green_inset*(normals_rise/normals_magnitude)])
 
-        tck, u = splprep([unclosed_green[0], unclosed_green[1]], s=0, per=True)
+        tck, u = _splprep([unclosed_green[0], unclosed_green[1]], s=0, per=True)
         green = splev(np.linspace(0, 1, green_length), tck)
         green_path = Path(np.column_stack((green[0], green[1])))
         
@@ -131,11 +149,12 @@ class Course():
 
     def generate(self):
         length = self._generate_length()
-        center_line = self._generate_center_line(length)
-        top_width = self._generate_width(length)
-        bottom_width = self._generate_width(length)
-        fairway, fairway_path, rough, rough_path = self._generate_fairway_shape(length, center_line, top_width, bottom_width)
-        green, green_path = self._generate_green_shape(length, fairway)
+        center_line = run_stage(self.instrument, self, 'center_line', self._generate_center_line, length)
+        top_width = run_stage(self.instrument, self, 'top_width', self._generate_width, length)
+        bottom_width = run_stage(self.instrument, self, 'bottom_width', self._generate_width, length)
+        fairway, fairway_path, rough, rough_path = run_stage(self.instrument, self, 'fairway', self._generate_fairway_shape,
+                                                             length, center_line, top_width, bottom_width)
+        green, green_path = run_stage(self.instrument, self, 'green', self._generate_green_shape, length, fairway)
 
         self.center_line = center_line
         self.fairway = fairway
@@ -144,14 +163,28 @@ class Course():
         self.rough_path = rough_path
         self.green = green
         self.green_path = green_path
+        self._lie_grids = {}
 
 
-    def on_fairway(self):
-        return bool
+    def lie_grid(self, resolution=1.0):
+        if resolution not in self._lie_grids:
+            polygons = [(ROUGH, *self.rough), (FAIRWAY, *self.fairway), (GREEN, *self.green)]
+            self._lie_grids[resolution] = LieGrid(polygons, resolution=resolution, background=OUT)
+        return self._lie_grids[resolution]
+
+
+    def lie_at(self, xs, ys, resolution=1.0):
+        return self.lie_grid(resolution).lie_at(xs, ys)
+
+
+    def on_fairway(self, xs, ys):
+        return self.lie_at(xs, ys) == FAIRWAY
 
 
 def main():
-    course = Course(dogleg=True)
+    import matplotlib.pyplot as plt
+
+    course = Course(dogleg=True, seed=10)
     course.generate()
 
     center_line = course.center_line
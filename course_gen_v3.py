@@ -1,38 +1,196 @@
 import numpy as np
-from scipy.interpolate import interp1d, PchipInterpolator, splprep, splev
-import matplotlib.pyplot as plt
-from math import copysign
-from matplotlib.path import Path
-from dataclasses import dataclass
-from functools import cached_property
-
-np.random.seed(1)
-
-@dataclass
-class Feature:
-    ftype: str
-    xx: tuple
-    yy: tuple
-    zz: tuple = ()
-    pos: tuple = (0, 0)
-    color: str = 'black'
-
-    @cached_property
-    def abs_xx(self):
-        return [x+self.pos[0] for x in self.xx]
-    
-    @cached_property
-    def abs_yy(self):
-        return [y+self.pos[1] for y in self.yy]
+from features import Feature, FeatureStore, FeatureType
+from distance import DistanceFields
+from lie import LieGrid
+from placement import OccupancyGrid
+from spatial import FeatureIndex
+from terrain import GradientNoise, HeightField
+from profiling import count_fits, run_stage
+from splines import smooth_closed_curves
+
+
+# scipy is only imported once a hole is actually generated, so loading stored holes stays NumPy-only
+@count_fits
+def _splprep(*args, **kwargs):
+    from scipy.interpolate import splprep
+    return splprep(*args, **kwargs)
 
 
 class CourseGenerator():
-    def __init__(self, length: int = 350):
+    VERSION = 6
+
+    STAGES = ('center_line', 'green', 'traps', 'fairway', 'terrain') # in dependency order
+    RANDOM_STREAMS = ('green', 'green_traps', 'traps', 'terrain') # stages that draw random numbers
+
+    # What every stage reads, parameters and earlier stages, in dependency order. Changing a
+    # parameter (update) or editing a stage's result (replace_stage) drops only what is downstream.
+    STAGE_INPUTS = {
+        'center_line': ('length',),
+        'green': ('center_line', 'length', 'resolution'),
+        'traps': ('center_line', 'green', 'length', 'resolution', 'n_traps', 'n_water', 'n_trees', 'hazard_clearance'),
+        'fairway': ('center_line', 'green', 'traps', 'length', 'resolution'),
+        'terrain': ('center_line', 'length', 'terrain_spacing'),
+        'feature_store': ('green', 'traps', 'fairway'),
+        'spatial_index': ('feature_store',),
+    }
+
+    # Hazard kinds in placement order (largest first): average blob size, where they may go as a
+    # fraction of the hole length, distance from the center line in yards, and plot colour
+    HAZARDS = {
+        FeatureType.WATER: dict(size=(22, 12), along=(0.2, 0.85), lateral=(25, 60), color='royalblue'),
+        FeatureType.TRAP: dict(size=(10, 5), along=(0.35, 0.95), lateral=(8, 30), color='wheat'),
+        FeatureType.TREES: dict(size=(7, 7), along=(0.05, 1.0), lateral=(28, 70), color='darkgreen'),
+    }
+
+    def __init__(self, length: int = 350, seed: int = None, rng: np.random.Generator = None, instrument=None,
+                 resolution: int = 100, terrain_spacing: float = 2, lazy: bool = False,
+                 n_traps: int = None, n_water: int = 0, n_trees: int = 0, hazard_clearance: float = 2):
         self.length = length
-        self.center_line = None
-        self.features = []
+        self.n_traps = n_traps # None draws 1 or 2
+        self.n_water = n_water
+        self.n_trees = n_trees
+        self.hazard_clearance = hazard_clearance # minimum gap in yards between hazards
+        self.resolution = resolution # points per smoothed outline
+        self.terrain_spacing = terrain_spacing # yards between height samples
+        self.instrument = instrument
+        self.lazy = lazy
+        self.rng = rng if rng is not None else np.random.default_rng(seed)
+        # Each stage draws from its own stream, so a stage gives the same result whenever it runs
+        self._stream_seed = int(self.rng.integers(2**63))
+        self._stages = {} # stage name -> memoized result
+        self._lie_grids = {} # resolution -> LieGrid
+        self._distance_fields = {} # resolution -> DistanceFields
+        self._lods = {} # tolerance -> FeatureStore
+
+        if not lazy:
+            self.generate()
+
+
+    def _stage_rng(self, stream: str):
+        return np.random.default_rng([self._stream_seed, self.RANDOM_STREAMS.index(stream)])
+
+
+    def _stage(self, name: str):
+        """Result of a generation stage, computed on first access"""
+        if name not in self._stages:
+            self._stages[name] = run_stage(self.instrument, self, name, getattr(self, f'_generate_{name}'))
+        return self._stages[name]
+
+
+    def _invalidate(self, changed):
+        """Drop every stage that reads, directly or not, one of the `changed` parameters or stages"""
+        stale = []
+        for name, inputs in self.STAGE_INPUTS.items():
+            if any(value in changed or value in stale for value in inputs):
+                stale.append(name)
+                self._stages.pop(name, None)
+        if {'green', 'traps', 'fairway'} & set(stale):
+            self._lie_grids.clear()
+            self._distance_fields.clear()
+            self._lods.clear()
+        return stale
+
+
+    def update(self, **params):
+        """
+        Change constructor parameters (length, n_traps, ...) and rerun only the stages that depend
+        on them. Stages draw from their own random streams, so the result is the hole a fresh
+        CourseGenerator with the new parameters and the same seed would build. Returns the names of
+        the stages that had to be redone (rebuilt now, or on next access when lazy).
+        """
+        known = {value for inputs in self.STAGE_INPUTS.values() for value in inputs} - set(self.STAGE_INPUTS)
+        changed = set()
+        for name, value in params.items():
+            if name not in known:
+                raise TypeError(f"{name!r} is not a generation parameter")
+            if getattr(self, name) != value:
+                setattr(self, name, value)
+                changed.add(name)
+        return self._refresh(self._invalidate(changed))
+
+
+    def replace_stage(self, name: str, value):
+        """Use `value` as the result of stage `name` (an edited trap list, ...) and rebuild what depends on it"""
+        if name not in self.STAGE_INPUTS:
+            raise KeyError(name)
+        self._stages[name] = value
+        return self._refresh(self._invalidate({name}))
+
+
+    def move_hazard(self, index: int, x: float, y: float):
+        """Move hazard `index` of `traps` to (x, y); no overlap check is made"""
+        hazards = list(self.traps)
+        hazard = hazards[index]
+        hazards[index] = Feature(ftype=hazard.ftype, xx=hazard.xx, yy=hazard.yy, pos=(x, y), color=hazard.color)
+        return self.replace_stage('traps', hazards)
+
+
+    def _refresh(self, stale):
+        if not self.lazy:
+            self.generate()
+        return stale
+
+
+    @property
+    def center_line(self):
+        return self._stage('center_line')
+
+
+    @property
+    def green(self):
+        return self._stage('green')
+
+
+    @property
+    def traps(self):
+        return self._stage('traps')
+
+
+    @property
+    def fairway(self):
+        return self._stage('fairway')
+
+
+    @property
+    def height_field(self):
+        return self._stage('terrain')
+
+
+    @property
+    def features(self):
+        return [self.green, *self.traps, self.fairway]
+
+
+    @property
+    def feature_store(self):
+        """
+        All features packed into one FeatureStore. Building it re-points the green, traps and
+        fairway at views into the store, so the per-feature arrays can be freed.
+        """
+        if 'feature_store' not in self._stages:
+            self._pack_features()
+        return self._stages['feature_store']
+
+
+    def _pack_features(self):
+        store = FeatureStore.from_features(self.features)
+        views = list(store)
+        self._stages.update(green=views[0], traps=views[1:-1], fairway=views[-1], feature_store=store)
+
 
-        self.generate()
+    def level_of_detail(self, tolerance: float):
+        """The features with outlines adaptively resampled to within `tolerance` yards"""
+        if tolerance not in self._lods:
+            self._lods[tolerance] = self.feature_store.resampled(tolerance)
+        return self._lods[tolerance]
+
+
+    @property
+    def spatial_index(self):
+        """FeatureIndex for point-in-feature, shot line and nearest-feature queries"""
+        if 'spatial_index' not in self._stages:
+            self._stages['spatial_index'] = FeatureIndex(self.feature_store)
+        return self._stages['spatial_index']
 
 
     def _generate_center_line(self):
@@ -48,32 +206,33 @@ class CourseGenerator():
         #     for i in range(1, inflection_points-1):
         #         y_points[i] = bend_intensity * np.exp(-((i-bend_location)/2)**2)
 
+        from scipy.interpolate import PchipInterpolator
         return PchipInterpolator(x_points, y_points)
 
 
-    def _generate_blob(self, avg_width: int, avg_height: int, variance: int = 1):
-        resolution = 100
+    def _generate_blobs(self, rng: np.random.Generator, avg_widths, avg_heights, variance: int = 1):
+        """One smoothed blob per (avg_width, avg_height) pair, as (n_blobs, resolution) arrays"""
+        resolution = self.resolution
+        avg_widths = np.asarray(avg_widths, dtype=float)[:, np.newaxis]
+        avg_heights = np.asarray(avg_heights, dtype=float)[:, np.newaxis]
 
         thetas = np.linspace(0, 2 * np.pi, 12)
-        radii = variance * np.random.randn(len(thetas))
-        xx = np.cos(thetas) * (radii + avg_width)
-        yy = np.sin(thetas) * (radii + avg_height)
+        radii = variance * rng.standard_normal((len(avg_widths), len(thetas)))
+        xx = np.cos(thetas) * (radii + avg_widths)
+        yy = np.sin(thetas) * (radii + avg_heights)
 
-        tck, _ = splprep([xx, yy], s=0, per=True)
-        smooth_xx, smooth_yy = splev(np.linspace(0, 1, resolution), tck)
-
-        return smooth_xx, smooth_yy
+        return smooth_closed_curves(xx, yy, resolution)
 
 
     def _generate_green(self):
         avg_radius = 15
         variance = 1
 
-        green_xx, green_yy = self._generate_blob(avg_width=avg_radius, avg_height=avg_radius, variance=variance)
+        (green_xx,), (green_yy,) = self._generate_blobs(self._stage_rng('green'), [avg_radius], [avg_radius], variance=variance)
         green_pos = (self.length, self.center_line(self.length))
 
         return Feature(
-            ftype="green",
+            ftype=FeatureType.GREEN,
             xx=green_xx, 
             yy=green_yy,
             pos=green_pos,
@@ -82,15 +241,16 @@ class CourseGenerator():
 
 
     def _generate_green_traps(self):
-        resolution = 100
+        resolution = self.resolution
         avg_width = 8
         variance = 1
         trap_outset = 1
         n_sample_points = 8
-        green = self.features[0]
+        green = self.green
+        rng = self._stage_rng('green_traps')
 
         sector_arc = len(green.xx) // 3
-        sector_start = np.random.choice([0, sector_arc, 2 * sector_arc])
+        sector_start = rng.choice([0, sector_arc, 2 * sector_arc])
         sector_slice = slice(sector_start, sector_start + sector_arc)
         sector_xx = green.xx[sector_slice]
         sector_yy = green.yy[sector_slice]
@@ -102,7 +262,7 @@ class CourseGenerator():
         nyy = -dxx / normals_length
 
         point_indicies = np.arange(1, sector_arc, sector_arc // n_sample_points)
-        widths = avg_width + variance * np.random.randn(len(point_indicies))
+        widths = avg_width + variance * rng.standard_normal(len(point_indicies))
 
         bot_xx = sector_xx[point_indicies] + trap_outset * nxx[point_indicies-1] 
         bot_yy = sector_yy[point_indicies] + trap_outset * nyy[point_indicies-1] 
@@ -112,12 +272,11 @@ class CourseGenerator():
         rough_trap_xx = np.concatenate((bot_xx, top_xx[::-1]))
         rough_trap_yy = np.concatenate((bot_yy, top_yy[::-1]))
         
-        tck, _ = splprep([rough_trap_xx, rough_trap_yy], s=0, per=True)
-        trap_xx, trap_yy = splev(np.linspace(0, 1, resolution), tck)
+        trap_xx, trap_yy = smooth_closed_curves(rough_trap_xx, rough_trap_yy, resolution)
         trap_pos = (self.length, self.center_line(self.length))
 
         return Feature(
-            ftype="trap",
+            ftype=FeatureType.TRAP,
             xx=trap_xx,
             yy=trap_yy,
             pos=trap_pos,
@@ -125,64 +284,113 @@ class CourseGenerator():
         )
 
 
+    def _play_area(self):
+        """(min_x, min_y, max_x, max_y) that every feature of the hole stays inside"""
+        tee_margin = 15
+        reach = max(spec['lateral'][1] + max(spec['size']) for spec in self.HAZARDS.values()) + 10
+        center_y = self.center_line(np.linspace(0, self.length, 50))
+        return (-tee_margin, center_y.min() - reach, self.length + reach, center_y.max() + reach)
+
+
+    def _hazard_grid(self):
+        """Occupancy grid over the area hazards may use, with the tee and the green already taken"""
+        tee_radius = 15
+        green_clearance = 3
+        grid = OccupancyGrid.around(self._play_area())
+
+        thetas = np.linspace(0, 2 * np.pi, 24)
+        grid.claim_polygon(tee_radius * np.cos(thetas), self.center_line(0) + tee_radius * np.sin(thetas))
+        grid.claim_polygon(self.green.abs_xx, self.green.abs_yy, clearance=green_clearance)
+        return grid
+
+
+    def _hazard_proposals(self, along, lateral):
+        """Candidate positions for a hazard: a stretch of the hole, either side of the center line"""
+        def propose(rng, n):
+            xs = rng.uniform(*along, n) * self.length
+            ys = self.center_line(xs) + rng.choice([-1, 1], n) * rng.uniform(*lateral, n)
+            return xs, ys
+        return propose
+
+
     def _generate_traps(self):
-        avg_width = 10
-        avg_height = 5
+        """
+        Bunkers, water and trees. Each hazard is rejection-sampled against an occupancy grid, so it
+        never overlaps the tee, the green or another hazard; one that finds no room is dropped.
+        """
         variance = 1
-
-        n_traps = np.random.randint(1, 3)
-        widths = np.full(n_traps, avg_width) + variance * np.random.randn(n_traps)
-        heights = np.full(n_traps, avg_height) + variance * np.random.randn(n_traps)
-
-        trap_shapes = [self._generate_blob(avg_width=widths[i], avg_height=heights[i]) for i in range(n_traps)]
-
-        traps = []
-        trap_distances = np.linspace(180, 260, n_traps) # 180, 260 placeholders for now
-        for trap_index, trap_x in enumerate(trap_distances):
-            lateral = np.random.choice([-1, 1]) * np.random.uniform(12, 25) # 12, 25 placeholders for now
-            trap_y = self.center_line(trap_x) + lateral
-            traps.append(Feature(ftype="trap", 
-                                 xx=trap_shapes[trap_index][0], 
-                                 yy=trap_shapes[trap_index][1], 
-                                 pos=(trap_x, trap_y),
-                                 color="wheat"))
-        
-        return traps
+        rng = self._stage_rng('traps')
+        counts = {
+            FeatureType.WATER: self.n_water,
+            FeatureType.TRAP: rng.integers(1, 3) if self.n_traps is None else self.n_traps,
+            FeatureType.TREES: self.n_trees,
+        }
+
+        grid = self._hazard_grid()
+        hazards = []
+        for ftype, spec in self.HAZARDS.items():
+            count = counts[ftype]
+            widths = spec['size'][0] + variance * rng.standard_normal(count)
+            heights = spec['size'][1] + variance * rng.standard_normal(count)
+            blobs_xx, blobs_yy = self._generate_blobs(rng, widths, heights)
+
+            propose = self._hazard_proposals(spec['along'], spec['lateral'])
+            for xx, yy in zip(blobs_xx, blobs_yy):
+                spot = grid.place(rng, xx, yy, propose, clearance=self.hazard_clearance)
+                if spot is not None:
+                    hazards.append(Feature(ftype=ftype, xx=xx, yy=yy, pos=spot, color=spec['color']))
+
+        return hazards
             
     
+    def _fairway_bumps(self, xx, features, base_width: int):
+        """
+        Widening of the fairway's top and bottom edges at `xx` around each feature, computed for
+        all features at once as a (features, samples) array of Gaussian bumps.
+        """
+        ftypes = np.array([feature.ftype for feature in features])
+        pos = np.array([feature.pos for feature in features], dtype=float).reshape(-1, 2)
+        is_green = ftypes == FeatureType.GREEN
+        is_trap = ftypes == FeatureType.TRAP
+
+        # Extent of every outline with one reduction over the concatenated outlines
+        counts = [len(feature.yy) for feature in features]
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.int64)
+        all_yy = np.concatenate([np.asarray(feature.yy, dtype=float) for feature in features])
+        top_extent = np.maximum.reduceat(all_yy, starts) + pos[:, 1]
+        bot_extent = np.minimum.reduceat(all_yy, starts) + pos[:, 1]
+
+        above = pos[:, 1] > self.center_line(pos[:, 0])
+        widths = np.where(is_green, 30, 15)
+        bumps = np.exp(-(xx[np.newaxis, :] - pos[:, 0, np.newaxis])**2 / (2 * widths[:, np.newaxis]**2))
+
+        top_amounts = np.where(is_green | (is_trap & above), top_extent - base_width//3, 0)
+        bot_amounts = np.where(is_green | (is_trap & ~above), bot_extent + base_width//3, 0)
+        return top_amounts @ bumps, bot_amounts @ bumps
+
+
     def _generate_fairway(self):
         base_width = 30
-        resolution = 100
+        resolution = self.resolution
     
         xx = np.linspace(0, self.length+10, resolution)
-        centerline_y = np.array([self.center_line(x) for x in xx])
-        yy_top = centerline_y + base_width / 2
-        yy_bot = centerline_y - base_width / 2
-        
-        for feature in self.features:
-            if feature.ftype == "green":
-                distances = np.abs(xx - feature.pos[0])
-                bump = np.exp(-distances**2 / (2*30**2))
-                yy_top += bump * (max(feature.abs_yy) - base_width//3)
-                yy_bot += bump * (min(feature.abs_yy) + base_width//3)
-            
-            elif feature.ftype == "trap":
-                distances = np.abs(xx - feature.pos[0])
-                bump = np.exp(-distances**2 / (2*15**2))
-                if feature.pos[1] > self.center_line(feature.pos[0]):
-                    yy_top += bump * (max(feature.abs_yy) - base_width//3)
-                else:
-                    yy_bot += bump * (min(feature.abs_yy) + base_width//3)
+        centerline_y = self.center_line(xx)
+        top_bumps, bot_bumps = self._fairway_bumps(xx, [self.green, *self.traps], base_width)
+        yy_top = centerline_y + base_width / 2 + top_bumps
+        yy_bot = centerline_y - base_width / 2 + bot_bumps
         
         fairway_xx = np.concatenate([xx, xx[::-1]])
         fairway_yy = np.concatenate([yy_top, yy_bot[::-1]])
 
-        tck, _ = splprep([fairway_xx, fairway_yy], s=0, per=True)
+        # The outline's vertices are far apart across the ends and dense along the sides, which a
+        # uniform-parameter spline would turn into spikes; keep the chord-length fit here
+        from scipy.interpolate import splev
+        tck, _ = _splprep([fairway_xx, fairway_yy], s=0, per=True)
         fairway_xx_smooth, fairway_yy_smooth = splev(np.linspace(0, 1, resolution), tck)
         fairway_pos = (0, 0)
 
         return Feature(
-            ftype="trap",
+            ftype=FeatureType.FAIRWAY,
             xx=fairway_xx_smooth,
             yy=fairway_yy_smooth,
             pos=fairway_pos,
@@ -190,23 +398,61 @@ class CourseGenerator():
         )
 
 
+    def _generate_terrain(self):
+        # Covers the play area rather than the placed features, so editing hazards or the fairway
+        # never invalidates the terrain
+        margin = 10
+        spacing = self.terrain_spacing
+        scale = 100 # larger = smoother terrain
+        amplitude = 3 # yards
+
+        min_x, min_y, max_x, max_y = self._play_area()
+        min_x, min_y, max_x, max_y = min_x - margin, min_y - margin, max_x + margin, max_y + margin
+
+        xx = np.arange(min_x, max_x + spacing, spacing)
+        yy = np.arange(min_y, max_y + spacing, spacing)
+        noise = GradientNoise(frequency=4, seed=int(self._stage_rng('terrain').integers(1, 10**5)), octaves=2)
+        heights = (noise.grid(xx / scale, yy / scale) * amplitude).astype(np.float32)
+
+        return HeightField(heights, origin=(xx[0], yy[0]), spacing=spacing)
+
+
     def generate(self):
-        self.center_line = self._generate_center_line()
-        self.features.append(self._generate_green())
-        # self.features.append(self._generate_green_traps())
-        self.features.extend(self._generate_traps())
-        self.features.append(self._generate_fairway())
+        """Run every stage that has not run yet"""
+        for name in self.STAGES:
+            self._stage(name)
+        if 'feature_store' not in self._stages:
+            self._pack_features()
+
+
+    def lie_grid(self, resolution: float = 1.0):
+        if resolution not in self._lie_grids:
+            self._lie_grids[resolution] = LieGrid.from_features(self.features, resolution=resolution)
+        return self._lie_grids[resolution]
+
+
+    def distance_fields(self, resolution: float = 1.0):
+        """Distance-to-pin and per-lie signed distance fields, built once per resolution"""
+        if resolution not in self._distance_fields:
+            self._distance_fields[resolution] = DistanceFields.from_course(self, resolution)
+        return self._distance_fields[resolution]
+
+
+    def lie_at(self, xs, ys, resolution: float = 1.0):
+        return self.lie_grid(resolution).lie_at(xs, ys)
         
 
 def main():
+    import matplotlib.pyplot as plt
+
     length = 350
     xx = np.linspace(0, length, 50) 
-    course = CourseGenerator(length)
+    course = CourseGenerator(length, seed=1)
 
     fig, ax = plt.subplots()
     # ax.plot(xx, center_line(xx), 'r-', label='')
     for feature in course.features[::-1]:
-        ax.fill(feature.abs_xx, feature.abs_yy, alpha=1, color=feature.color, label=feature.ftype)
+        ax.fill(feature.abs_xx, feature.abs_yy, alpha=1, color=feature.color, label=feature.ftype.name.lower())
 
     ax.grid(True)
     ax.legend(loc='best')
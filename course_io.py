@@ -0,0 +1,251 @@
+"""
+Binary course archives.
+
+An archive holds any number of generated holes in one file:
+
+    header   32 bytes: magic, format version, hole count, index offset, index length
+    data     contiguous arrays, each aligned to 64 bytes
+               - feature outlines, one float32 (2, points) block per hole
+               - centerline samples, float32 (2, points)
+               - heightmap, float32 (rows, cols)
+               - lie grid, uint8 (rows, cols)
+               - optional distance fields on the lie grid cells, float32 (rows, cols) to the pin
+                 and float32 (lies, rows, cols) signed distances
+    index    UTF-8 JSON describing where each hole's arrays live
+
+open_courses() maps the file with np.memmap and hands out views into it, so loading a hole does
+no parsing of array data, no copying and no spline fitting.
+"""
+import json
+import struct
+
+import numpy as np
+
+from features import FeatureStore, FeatureType
+from distance import DistanceFields
+from lie import LieGrid, feature_polygons
+from spatial import FeatureIndex
+from terrain import HeightField
+
+MAGIC = b'TGOLF\x00\x00\x00'
+FORMAT_VERSION = 1
+_HEADER = struct.Struct('<8sIIQQ')
+_ALIGN = 64
+
+
+class _ArchiveWriter():
+    def __init__(self, file):
+        self.file = file
+        self.offset = _HEADER.size
+        file.write(b'\x00' * _HEADER.size)
+
+
+    def write(self, array, dtype):
+        """Append `array` as `dtype` and return its (offset, shape) entry"""
+        pad = -self.offset % _ALIGN
+        self.file.write(b'\x00' * pad)
+        self.offset += pad
+
+        array = np.ascontiguousarray(array, dtype=dtype)
+        entry = {'offset': self.offset, 'shape': list(array.shape)}
+        self.file.write(array.tobytes())
+        self.offset += array.nbytes
+        return entry
+
+
+def _hole_record(writer, course, lie_resolution, distance_fields, outline_tolerance):
+    record = {'length': int(course.length), 'features': []}
+
+    store = getattr(course, 'feature_store', None)
+    if store is None:
+        store = FeatureStore.from_features(course.features)
+    if outline_tolerance is not None:
+        store = store.resampled(outline_tolerance)
+    for i in range(len(store)):
+        record['features'].append({
+            'ftype': FeatureType(store.ftypes[i]).name.lower(),
+            'color': store.colors[i],
+            'pos': store.pos[i].tolist(),
+            'start': int(store.offsets[i]),
+            'count': int(store.offsets[i + 1] - store.offsets[i]),
+        })
+    record['outlines'] = writer.write(np.stack([store.xx, store.yy]), np.float32)
+
+    center_xx = np.arange(0, course.length + 1, dtype=float)
+    record['center_line'] = writer.write(np.stack([center_xx, course.center_line(center_xx)]), np.float32)
+
+    height_field = getattr(course, 'height_field', None)
+    if height_field is not None:
+        record['heights'] = writer.write(height_field.heights, np.float32)
+        record['heights'].update(origin=[float(v) for v in height_field.origin], spacing=float(height_field.spacing))
+
+    if lie_resolution is not None:
+        lie_grid = course.lie_grid(lie_resolution)
+        record['lies'] = writer.write(lie_grid.lies, np.uint8)
+        record['lies'].update(origin=[float(v) for v in lie_grid.origin],
+                              resolution=float(lie_grid.resolution),
+                              background=int(lie_grid.background))
+
+        if distance_fields:
+            fields = course.distance_fields(lie_resolution)
+            lies = sorted(fields.signed)
+            record['distances'] = {
+                'lies': lies,
+                'pin': writer.write(fields.pin, np.float32),
+                'signed': writer.write(np.stack([fields.signed[lie] for lie in lies]), np.float32),
+            }
+    return record
+
+
+def write_courses(path, courses, lie_resolution: float = 1.0, distance_fields: bool = False,
+                  outline_tolerance: float = None):
+    """
+    Write generated holes (CourseGenerator or StoredHole) to an archive at `path`, a file name or
+    an empty, seekable binary file object.
+
+    `courses` may be any iterable, including a generator, so large batches are streamed to disk
+    one hole at a time. Pass lie_resolution=None to leave out the lie grids. With distance_fields
+    each hole's DistanceFields on the lie grid are stored too, so loaded holes need no scipy to
+    answer distance queries. With outline_tolerance the outlines are stored adaptively resampled
+    to within that many yards, which usually takes a fraction of the vertices.
+    """
+    if hasattr(path, 'write'):
+        return _write_archive(path, courses, lie_resolution, distance_fields, outline_tolerance)
+    with open(path, 'wb') as file:
+        return _write_archive(file, courses, lie_resolution, distance_fields, outline_tolerance)
+
+
+def _write_archive(file, courses, lie_resolution, distance_fields, outline_tolerance):
+    writer = _ArchiveWriter(file)
+    holes = [_hole_record(writer, course, lie_resolution, distance_fields, outline_tolerance) for course in courses]
+
+    index = json.dumps({'holes': holes}, separators=(',', ':')).encode('utf-8')
+    index_offset = writer.offset
+    file.write(index)
+
+    file.seek(0)
+    file.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(holes), index_offset, len(index)))
+    return len(holes)
+
+
+class StoredHole():
+    """A hole loaded from an archive; every array is a view into the memory-mapped file"""
+
+    def __init__(self, data, record):
+        self.length = record['length']
+        self.record = record
+
+        outlines = _view(data, record['outlines'], np.float32)
+        entries = record['features']
+        self.feature_store = FeatureStore(
+            ftypes=[FeatureType.of(entry['ftype']) for entry in entries],
+            offsets=np.concatenate([[0], np.cumsum([entry['count'] for entry in entries])]), # written back to back
+            xx=outlines[0],
+            yy=outlines[1],
+            pos=[entry['pos'] for entry in entries],
+            colors=[entry['color'] for entry in entries],
+        )
+        self.features = list(self.feature_store)
+
+        self.center_line_xx, self.center_line_yy = _view(data, record['center_line'], np.float32)
+
+        self.height_field = None
+        if 'heights' in record:
+            heights = record['heights']
+            self.height_field = HeightField(_view(data, heights, np.float32), heights['origin'], heights['spacing'])
+
+        self._spatial_index = None
+        self._stored_lies = {} # resolution -> (lies view, origin, background), wrapped on first use
+        self._lie_grids = {}
+        self._distance_fields = {}
+        if 'lies' in record:
+            lies = record['lies']
+            self._stored_lies[lies['resolution']] = (_view(data, lies, np.uint8), lies['origin'], lies['background'])
+
+            if 'distances' in record:
+                distances = record['distances']
+                signed = _view(data, distances['signed'], np.float32)
+                self._distance_fields[lies['resolution']] = DistanceFields(
+                    lies['origin'], lies['resolution'], pin=_view(data, distances['pin'], np.float32),
+                    signed=dict(zip(distances['lies'], signed)))
+
+
+    def center_line(self, xx):
+        return np.interp(xx, self.center_line_xx, self.center_line_yy)
+
+
+    @property
+    def spatial_index(self):
+        if self._spatial_index is None:
+            self._spatial_index = FeatureIndex(self.feature_store)
+        return self._spatial_index
+
+
+    def lie_grid(self, resolution: float = 1.0):
+        if resolution not in self._lie_grids:
+            if resolution in self._stored_lies:
+                lies, origin, background = self._stored_lies[resolution]
+                self._lie_grids[resolution] = LieGrid.from_raster(lies, origin, resolution,
+                                                                  polygons=feature_polygons(self.features),
+                                                                  background=background)
+            else:
+                self._lie_grids[resolution] = LieGrid.from_features(self.features, resolution=resolution)
+        return self._lie_grids[resolution]
+
+
+    def lie_at(self, xs, ys, resolution: float = 1.0):
+        return self.lie_grid(resolution).lie_at(xs, ys)
+
+
+    def distance_fields(self, resolution: float = 1.0):
+        if resolution not in self._distance_fields:
+            self._distance_fields[resolution] = DistanceFields.from_course(self, resolution)
+        return self._distance_fields[resolution]
+
+
+def _view(data, entry, dtype):
+    count = int(np.prod(entry['shape']))
+    return np.frombuffer(data, dtype=dtype, count=count, offset=entry['offset']).reshape(entry['shape'])
+
+
+class CourseArchive():
+    """Read-only, memory-mapped archive; holes are materialized on first access"""
+
+    def __init__(self, path, data=None):
+        self.path = path
+        # `data` holds an archive already in memory (bytes), read-only like the mapped file
+        self.data = np.memmap(path, dtype=np.uint8, mode='r') if data is None else np.frombuffer(data, dtype=np.uint8)
+
+        magic, version, n_holes, index_offset, index_length = _HEADER.unpack(bytes(self.data[:_HEADER.size]))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a course archive")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path} has format version {version}, expected {FORMAT_VERSION}")
+
+        index = json.loads(bytes(self.data[index_offset:index_offset + index_length]))
+        self.records = index['holes']
+        if len(self.records) != n_holes:
+            raise ValueError(f"{path} index lists {len(self.records)} holes, header says {n_holes}")
+        self._holes = {}
+
+
+    def __len__(self):
+        return len(self.records)
+
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        if i not in self._holes:
+            self._holes[i] = StoredHole(self.data, self.records[i])
+        return self._holes[i]
+
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+def open_courses(path):
+    return CourseArchive(path)
@@ -0,0 +1,106 @@
+"""
+Precomputed distance fields of a hole.
+
+Built once from the hole's lie grid, on the same cells:
+
+    pin      yards to the pin, measured along the center line (so a dogleg is not cut short)
+             and combined with the lateral offset from it; Euclidean once level with the pin
+    signed   one signed distance field per lie present on the hole: negative inside that lie,
+             positive outside, zero on its edge
+
+Lookups snap each position to its cell and index the arrays, so any number of queries costs one
+gather and is accurate to about one cell. Positions off the grid use the nearest edge cell.
+
+    fields = course.distance_fields()
+    fields.to_pin(xs, ys)
+    fields.signed_distance(TRAP, xs, ys)    # > 0: yards to the nearest bunker
+"""
+import numpy as np
+
+from features import FeatureType
+from lie import TRAP, WATER
+
+
+class DistanceFields():
+
+    def __init__(self, origin, resolution: float, pin, signed):
+        """`pin` is a (rows, cols) array, `signed` a {lie: (rows, cols) array} dict"""
+        self.origin = tuple(origin)
+        self.resolution = resolution
+        self.pin = pin
+        self.signed = signed
+        self.shape = pin.shape
+
+
+    @classmethod
+    def from_course(cls, course, resolution: float = 1.0):
+        """Distance fields on the cells of course.lie_grid(resolution)"""
+        from scipy.ndimage import distance_transform_edt
+
+        grid = course.lie_grid(resolution)
+        n_rows, n_cols = grid.shape
+        xs = grid.origin[0] + (np.arange(n_cols) + 0.5) * resolution
+        ys = grid.origin[1] + (np.arange(n_rows) + 0.5) * resolution
+
+        pin_x = _pin(course)[0]
+        center_ys = course.center_line(xs)
+        along = np.concatenate([[0], np.cumsum(np.hypot(np.diff(xs), np.diff(center_ys)))])
+        remaining = np.abs(np.interp(pin_x, xs, along) - along)
+        pin = np.hypot(remaining[np.newaxis, :], ys[:, np.newaxis] - center_ys[np.newaxis, :]).astype(np.float32)
+
+        signed = {}
+        for lie in np.unique(grid.lies):
+            inside = grid.lies == lie
+            # distances between cell centers; the edge lies half a cell out from the last cell
+            outside_distance = distance_transform_edt(~inside) - 0.5
+            inside_distance = distance_transform_edt(inside) - 0.5
+            signed[int(lie)] = (np.where(inside, -inside_distance, outside_distance) * resolution).astype(np.float32)
+
+        return cls(grid.origin, resolution, pin, signed)
+
+
+    def _cells(self, xs, ys):
+        xs, ys = np.broadcast_arrays(np.asarray(xs, dtype=float), np.asarray(ys, dtype=float))
+        cols = np.clip(np.floor((xs - self.origin[0]) / self.resolution).astype(np.int64), 0, self.shape[1] - 1)
+        rows = np.clip(np.floor((ys - self.origin[1]) / self.resolution).astype(np.int64), 0, self.shape[0] - 1)
+        return rows, cols
+
+
+    def to_pin(self, xs, ys):
+        """Yards to the pin from each position"""
+        rows, cols = self._cells(xs, ys)
+        return self.pin[rows, cols]
+
+
+    def signed_distance(self, lie: int, xs, ys):
+        """Signed yards to the edge of `lie` (negative inside it); inf when the hole has none"""
+        rows, cols = self._cells(xs, ys)
+        if lie not in self.signed:
+            return np.full(rows.shape, np.inf, dtype=np.float32)
+        return self.signed[lie][rows, cols]
+
+
+    def to_edge(self, lies, xs, ys):
+        """Yards from each position to the edge of the lie it is in, given those lies"""
+        rows, cols = self._cells(xs, ys)
+        lies = np.broadcast_to(np.asarray(lies), rows.shape)
+        distances = np.zeros(rows.shape, dtype=np.float32)
+        for lie, field in self.signed.items():
+            here = lies == lie
+            distances[here] = -field[rows[here], cols[here]]
+        return np.maximum(distances, 0)
+
+
+    def to_hazard(self, xs, ys, hazards=(TRAP, WATER)):
+        """Yards to the nearest hazard (0 inside one, inf when the hole has none)"""
+        distances = [np.maximum(self.signed_distance(lie, xs, ys), 0) for lie in hazards]
+        return np.minimum.reduce(distances) if distances else np.full(np.shape(xs), np.inf)
+
+
+def _pin(course):
+    """Pin position: the center of the green, or the end of the center line without one"""
+    store = getattr(course, 'feature_store', None)
+    greens = np.flatnonzero(store.ftypes == FeatureType.GREEN) if store is not None else ()
+    if len(greens):
+        return tuple(store.pos[greens[0]])
+    return course.length, float(course.center_line(course.length))
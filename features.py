@@ -0,0 +1,161 @@
+"""
+Course feature data model.
+
+Feature is a slotted record whose outline is held as NumPy arrays; absolute coordinates are one
+vectorized add rather than Python lists. FeatureStore packs all features of a hole into a
+structure of arrays (one outline buffer plus an offsets table), and the Features it hands out are
+views into that buffer, so a cached hole costs a handful of arrays instead of an object graph.
+"""
+from dataclasses import dataclass
+from enum import IntEnum
+
+import numpy as np
+
+from splines import resample_closed_curve
+
+LOD_TOLERANCES = (0.05, 0.25, 1.0) # yards an outline may stray from the full-detail curve, finest first
+
+
+class FeatureType(IntEnum):
+    GREEN = 1
+    TRAP = 2
+    FAIRWAY = 3
+    ROUGH = 4
+    WATER = 5
+    TREES = 6
+
+    @classmethod
+    def of(cls, value):
+        """FeatureType from a member, its value or its (case-insensitive) name"""
+        if isinstance(value, str):
+            return cls[value.upper()]
+        return cls(value)
+
+
+def _as_outline(values):
+    array = np.asarray(values)
+    if not np.issubdtype(array.dtype, np.floating):
+        array = array.astype(float)
+    return array
+
+
+@dataclass(slots=True, eq=False)
+class Feature:
+    ftype: FeatureType
+    xx: np.ndarray
+    yy: np.ndarray
+    zz: tuple = ()
+    pos: tuple = (0, 0)
+    color: str = 'black'
+
+    def __post_init__(self):
+        self.ftype = FeatureType.of(self.ftype)
+        self.xx = _as_outline(self.xx)
+        self.yy = _as_outline(self.yy)
+
+    @property
+    def abs_xx(self):
+        return self.xx + self.pos[0]
+
+    @property
+    def abs_yy(self):
+        return self.yy + self.pos[1]
+
+
+class FeatureStore():
+    """All features of one hole as a structure of arrays"""
+
+    __slots__ = ('ftypes', 'offsets', 'xx', 'yy', 'pos', 'colors')
+
+    def __init__(self, ftypes, offsets, xx, yy, pos, colors):
+        self.ftypes = np.asarray(ftypes, dtype=np.uint8) # FeatureType values
+        self.offsets = np.asarray(offsets, dtype=np.int64) # feature i is xx[offsets[i]:offsets[i + 1]]
+        self.xx = _as_outline(xx)
+        self.yy = _as_outline(yy)
+        self.pos = np.asarray(pos, dtype=float).reshape(-1, 2)
+        self.colors = tuple(colors)
+
+
+    @classmethod
+    def from_features(cls, features):
+        features = list(features)
+        counts = [len(feature.xx) for feature in features]
+        return cls(
+            ftypes=[feature.ftype for feature in features],
+            offsets=np.concatenate([[0], np.cumsum(counts)]),
+            xx=np.concatenate([feature.xx for feature in features]) if features else np.zeros(0),
+            yy=np.concatenate([feature.yy for feature in features]) if features else np.zeros(0),
+            pos=[(float(feature.pos[0]), float(feature.pos[1])) for feature in features],
+            colors=[feature.color for feature in features],
+        )
+
+
+    def __len__(self):
+        return len(self.ftypes)
+
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        outline = slice(self.offsets[i], self.offsets[i + 1])
+        return Feature(ftype=FeatureType(self.ftypes[i]), xx=self.xx[outline], yy=self.yy[outline],
+                       pos=(self.pos[i, 0], self.pos[i, 1]), color=self.colors[i])
+
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+    @property
+    def counts(self):
+        return np.diff(self.offsets)
+
+
+    @property
+    def abs_xx(self):
+        """Absolute x of every outline point of every feature"""
+        return self.xx + np.repeat(self.pos[:, 0], self.counts)
+
+
+    @property
+    def abs_yy(self):
+        return self.yy + np.repeat(self.pos[:, 1], self.counts)
+
+
+    def bounds(self):
+        """(n_features, 4) array of absolute min_x, min_y, max_x, max_y per feature"""
+        if len(self) == 0:
+            return np.zeros((0, 4))
+        starts = self.offsets[:-1]
+        return np.column_stack([
+            np.minimum.reduceat(self.xx, starts) + self.pos[:, 0],
+            np.minimum.reduceat(self.yy, starts) + self.pos[:, 1],
+            np.maximum.reduceat(self.xx, starts) + self.pos[:, 0],
+            np.maximum.reduceat(self.yy, starts) + self.pos[:, 1],
+        ])
+
+
+    def resampled(self, tolerance: float, max_segment: float = None):
+        """Copy of the store with every outline adaptively resampled to within `tolerance` yards"""
+        outlines = [resample_closed_curve(feature.xx, feature.yy, tolerance, max_segment) for feature in self]
+        counts = [len(xx) for xx, _ in outlines]
+        return FeatureStore(
+            ftypes=self.ftypes,
+            offsets=np.concatenate([[0], np.cumsum(counts)]),
+            xx=np.concatenate([xx for xx, _ in outlines]) if outlines else np.zeros(0),
+            yy=np.concatenate([yy for _, yy in outlines]) if outlines else np.zeros(0),
+            pos=self.pos,
+            colors=self.colors,
+        )
+
+
+    def levels_of_detail(self, tolerances=LOD_TOLERANCES):
+        """One resampled store per tolerance, finest first"""
+        return [self.resampled(tolerance) for tolerance in tolerances]
+
+
+    @property
+    def nbytes(self):
+        return self.ftypes.nbytes + self.offsets.nbytes + self.xx.nbytes + self.yy.nbytes + self.pos.nbytes
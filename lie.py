@@ -0,0 +1,121 @@
+import numpy as np
+
+from features import FeatureType
+from raster import fill_polygon, outline_cells, points_in_polygon
+
+# Lie codes stored in the uint8 grid
+OUT = 0
+ROUGH = 1
+FAIRWAY = 2
+GREEN = 3
+TRAP = 4
+WATER = 5
+TREES = 6
+
+LIE_NAMES = ('out', 'rough', 'fairway', 'green', 'trap', 'water', 'trees')
+
+FEATURE_LIES = {
+    FeatureType.ROUGH: ROUGH,
+    FeatureType.FAIRWAY: FAIRWAY,
+    FeatureType.GREEN: GREEN,
+    FeatureType.TRAP: TRAP,
+    FeatureType.WATER: WATER,
+    FeatureType.TREES: TREES,
+}
+
+GRID_MARGIN = 5.0 # yards of background a LieGrid keeps around the outermost polygon
+
+# Later entries are painted over earlier ones (a green-side trap wins over the green)
+LIE_PRIORITY = (ROUGH, FAIRWAY, GREEN, TREES, TRAP, WATER)
+
+
+def feature_polygons(features):
+    """(lie, xx, yy) outlines of the features that have a lie"""
+    return [(FEATURE_LIES[feature.ftype], feature.abs_xx, feature.abs_yy)
+            for feature in features if feature.ftype in FEATURE_LIES]
+
+
+class LieGrid():
+    """
+    Rasterized surface classification of a hole.
+
+    Polygons are painted once into a uint8 grid so a lie lookup is an array index. Cells that a
+    polygon outline passes through are flagged, and points landing in them are resolved against the
+    exact polygons. Every other cell is wholly inside or outside each polygon, so the answer does
+    not depend on the grid resolution, even for slivers thinner than a cell.
+    """
+
+    def __init__(self, polygons, resolution: float = 1.0, background: int = ROUGH, margin: float = GRID_MARGIN):
+        """`polygons` is a list of (lie, xx, yy) outlines in absolute course coordinates"""
+        self.resolution = resolution
+        self.background = background
+        self.polygons = sorted(polygons, key=lambda polygon: LIE_PRIORITY.index(polygon[0]))
+
+        all_xx = np.concatenate([np.asarray(xx, dtype=float) for _, xx, _ in self.polygons])
+        all_yy = np.concatenate([np.asarray(yy, dtype=float) for _, _, yy in self.polygons])
+        self.origin = (all_xx.min() - margin, all_yy.min() - margin)
+        self.shape = (int(np.ceil((all_yy.max() + margin - self.origin[1]) / resolution)),
+                      int(np.ceil((all_xx.max() + margin - self.origin[0]) / resolution)))
+
+        self.lies = np.full(self.shape, background, dtype=np.uint8)
+        for lie, xx, yy in self.polygons:
+            self.lies[fill_polygon(xx, yy, self.origin, resolution, self.shape)] = lie
+
+        self._boundary = None
+
+
+    @classmethod
+    def from_raster(cls, lies, origin, resolution: float, polygons=(), background: int = ROUGH):
+        """Wrap an already painted grid (e.g. one loaded from disk) without rasterizing again"""
+        grid = cls.__new__(cls)
+        grid.resolution = resolution
+        grid.background = background
+        grid.polygons = sorted(polygons, key=lambda polygon: LIE_PRIORITY.index(polygon[0]))
+        grid.origin = tuple(origin)
+        grid.lies = lies
+        grid.shape = lies.shape
+        grid._boundary = None # found on the first exact lookup, so loading a stored grid does no work
+        return grid
+
+
+    @classmethod
+    def from_features(cls, features, resolution: float = 1.0, background: int = ROUGH, margin: float = GRID_MARGIN):
+        return cls(feature_polygons(features), resolution=resolution, background=background, margin=margin)
+
+
+    @property
+    def boundary(self):
+        """Bool grid of the cells crossed or touched by any polygon outline"""
+        if self._boundary is None:
+            self._boundary = np.zeros(self.shape, dtype=bool)
+            for _, xx, yy in self.polygons:
+                self._boundary[outline_cells(xx, yy, self.origin, self.resolution, self.shape)] = True
+        return self._boundary
+
+
+    def _exact_lies(self, xs, ys):
+        lies = np.full(xs.shape, self.background, dtype=np.uint8)
+        for lie, xx, yy in self.polygons:
+            lies[points_in_polygon(xs, ys, xx, yy)] = lie
+        return lies
+
+
+    def lie_at(self, xs, ys, exact: bool = True):
+        """Lie code(s) at the given point(s); points off the grid are OUT"""
+        scalar = np.ndim(xs) == 0 and np.ndim(ys) == 0
+        xs, ys = np.broadcast_arrays(np.asarray(xs, dtype=float), np.asarray(ys, dtype=float))
+
+        cols = np.floor((xs - self.origin[0]) / self.resolution).astype(np.int64)
+        rows = np.floor((ys - self.origin[1]) / self.resolution).astype(np.int64)
+        inside = (rows >= 0) & (rows < self.shape[0]) & (cols >= 0) & (cols < self.shape[1])
+
+        lies = np.full(xs.shape, OUT, dtype=np.uint8)
+        lies[inside] = self.lies[rows[inside], cols[inside]]
+
+        if exact:
+            near_edge = np.zeros(xs.shape, dtype=bool)
+            near_edge[inside] = self.boundary[rows[inside], cols[inside]]
+            if near_edge.any():
+                lies[near_edge] = self._exact_lies(xs[near_edge], ys[near_edge])
+
+        return int(lies) if scalar else lies
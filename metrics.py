@@ -0,0 +1,298 @@
+"""
+Batched hole-quality metrics and a streaming filter for curating generated holes.
+
+hole_metrics() computes one value per hole for a whole batch at once. Outline areas come from a
+single shoelace reduction over the concatenated outlines of every hole. For the other checks the
+outlines of the batch are stacked into (holes, points) arrays, ragged ones padded, and terrains of
+one shape into a single array, so each check is one broadcast pass; only sampling each hole's
+center line is a per-hole call. Metrics are returned column-wise, as {name: array of n_holes}:
+
+    fairway_area         square yards of fairway
+    green_area           square yards of green
+    hazard_area          square yards of bunkers, water and trees
+    hazard_coverage      hazard_area / fairway_area
+    min_corridor_width   narrowest fairway width, sampled across its middle 80%
+    hazards_on_green     hazards overlapping the green
+    dogleg_offset        largest distance of the center line from the straight tee-green line;
+                         always 0 for CourseGenerator holes, whose center line is straight
+    elevation_variance   variance of the terrain heights (nan without terrain)
+
+filter_holes() streams candidates through those metrics in batches and yields the ones that meet
+the constraints, so a pool of any size is curated in constant memory:
+
+    python metrics.py --holes 2000 --workers 8
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import os
+import time
+
+import numpy as np
+
+from features import Feature, FeatureStore, FeatureType
+
+HAZARD_TYPES = (FeatureType.TRAP, FeatureType.WATER, FeatureType.TREES)
+
+# Default curation rules: {metric: (minimum, maximum)}, None for no bound
+CONSTRAINTS = {
+    'min_corridor_width': (15, None),
+    'green_area': (300, None),
+    'hazards_on_green': (None, 0),
+    'hazard_coverage': (None, 0.5),
+    'dogleg_offset': (None, 60),
+}
+
+_CORRIDOR_SAMPLES = 64
+_PAIR_CHUNK = 64 # green/hazard pairs per (pairs, points, edges) block
+
+
+def _feature_store(hole):
+    """FeatureStore of any generated hole: CourseGenerator, StoredHole, WorldHole or v2 Course"""
+    store = getattr(hole, 'feature_store', None)
+    if store is not None:
+        return store
+    if hasattr(hole, 'fairway_path'): # course_gen_v2.Course keeps (2, n) outline arrays
+        return FeatureStore.from_features([
+            Feature(ftype=FeatureType.ROUGH, xx=hole.rough[0], yy=hole.rough[1]),
+            Feature(ftype=FeatureType.FAIRWAY, xx=hole.fairway[0], yy=hole.fairway[1]),
+            Feature(ftype=FeatureType.GREEN, xx=hole.green[0], yy=hole.green[1]),
+        ])
+    raise TypeError(f"{type(hole).__name__} has no feature outlines")
+
+
+def outline_areas(stores):
+    """(areas, ftypes, hole index) of every feature of every store, with one reduction"""
+    counts = np.array([len(store.xx) for store in stores])
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    offsets = np.concatenate([store.offsets[:-1] + start for store, start in zip(stores, starts)])
+    ends = np.concatenate([store.offsets[1:] + start for store, start in zip(stores, starts)])
+    xx = np.concatenate([store.xx for store in stores]).astype(float)
+    yy = np.concatenate([store.yy for store in stores]).astype(float)
+
+    # shoelace: each vertex pairs with the next one of its own outline, the last wrapping to the first
+    following = np.arange(1, len(xx) + 1)
+    following[ends - 1] = offsets
+    cross = xx * yy[following] - xx[following] * yy
+    areas = 0.5 * np.abs(np.add.reduceat(cross, offsets)) if len(offsets) else np.zeros(0)
+
+    ftypes = np.concatenate([store.ftypes for store in stores])
+    holes = np.repeat(np.arange(len(stores)), [len(store) for store in stores])
+    return areas, ftypes, holes
+
+
+def _outline(store, i):
+    start, end = store.offsets[i], store.offsets[i + 1]
+    return store.xx[start:end] + store.pos[i, 0], store.yy[start:end] + store.pos[i, 1]
+
+
+def _padded(outlines):
+    """
+    (n, longest) xx and yy arrays of closed outlines. Shorter outlines repeat their last vertex,
+    which adds only zero-length edges and duplicate points.
+    """
+    lengths = np.array([len(xx) for xx, _ in outlines])
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    index = starts[:, np.newaxis] + np.minimum(np.arange(lengths.max()), lengths[:, np.newaxis] - 1)
+    xx = np.concatenate([xx for xx, _ in outlines]).astype(float)[index]
+    yy = np.concatenate([yy for _, yy in outlines]).astype(float)[index]
+    return xx, yy
+
+
+def _closed_edges(xx, yy):
+    """Edge endpoints of (..., points) outlines, each edge running to the next vertex"""
+    return xx, yy, np.roll(xx, -1, axis=-1), np.roll(yy, -1, axis=-1)
+
+
+def _corridor_widths(xx, yy):
+    """Narrowest vertical extent of each (holes, points) outline across the middle 80% of its length"""
+    low = xx.min(axis=1, keepdims=True)
+    span = xx.max(axis=1, keepdims=True) - low
+    column = (low + span * np.linspace(0.1, 0.9, _CORRIDOR_SAMPLES))[:, :, np.newaxis] # (holes, samples, 1)
+    x0, y0, x1, y1 = (edge[:, np.newaxis, :] for edge in _closed_edges(xx, yy)) # (holes, 1, edges)
+
+    crosses = (x0 <= column) != (x1 <= column)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cross_y = y0 + (column - x0) * (y1 - y0) / (x1 - x0)
+    top = np.where(crosses, cross_y, -np.inf).max(axis=2)
+    bottom = np.where(crosses, cross_y, np.inf).min(axis=2)
+    widths = np.where(crosses.any(axis=2), top - bottom, 0)
+    return widths.min(axis=1)
+
+
+def _points_in_polygons(px, py, xx, yy):
+    """(pairs, points) even-odd test of points (pairs, points) against polygons (pairs, edges)"""
+    x0, y0, x1, y1 = (edge[:, np.newaxis, :] for edge in _closed_edges(xx, yy))
+    qx, qy = px[:, :, np.newaxis], py[:, :, np.newaxis]
+    crosses = (y0 <= qy) != (y1 <= qy)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cross_x = x0 + (qy - y0) * (x1 - x0) / (y1 - y0)
+    return (np.count_nonzero(crosses & (cross_x < qx), axis=2) & 1).astype(bool)
+
+
+def _hazards_on_green(stores):
+    """Number of hazards whose outline overlaps the green, per store"""
+    greens, hazards, owners = [], [], []
+    for k, store in enumerate(stores):
+        green = np.flatnonzero(store.ftypes == FeatureType.GREEN)
+        if len(green) == 0:
+            continue
+        greens.append(_outline(store, green[0]))
+        for i in np.flatnonzero(np.isin(store.ftypes, HAZARD_TYPES)):
+            hazards.append(_outline(store, i))
+            owners.append(len(greens) - 1)
+    on_green = np.zeros(len(stores), dtype=np.int64)
+    if not hazards:
+        return on_green
+
+    green_xx, green_yy = _padded(greens)
+    hazard_xx, hazard_yy = _padded(hazards)
+    owners = np.array(owners)
+
+    # only pairs whose bounding boxes overlap need the exact tests
+    candidates = np.flatnonzero((hazard_xx.min(axis=1) <= green_xx.max(axis=1)[owners]) &
+                                (hazard_xx.max(axis=1) >= green_xx.min(axis=1)[owners]) &
+                                (hazard_yy.min(axis=1) <= green_yy.max(axis=1)[owners]) &
+                                (hazard_yy.max(axis=1) >= green_yy.min(axis=1)[owners]))
+    overlapping = np.zeros(len(owners), dtype=bool)
+    for start in range(0, len(candidates), _PAIR_CHUNK):
+        pairs = candidates[start:start + _PAIR_CHUNK]
+        hazard = hazard_xx[pairs], hazard_yy[pairs]
+        green = green_xx[owners[pairs]], green_yy[owners[pairs]]
+        overlapping[pairs] = (_points_in_polygons(*hazard, *green).any(axis=1) |
+                              _points_in_polygons(*green, *hazard).any(axis=1))
+
+    with_green = [k for k, store in enumerate(stores) if (store.ftypes == FeatureType.GREEN).any()]
+    on_green[with_green] = np.bincount(owners, weights=overlapping, minlength=len(greens))
+    return on_green
+
+
+def _dogleg_offsets(holes, fairways):
+    """Largest distance of each center line from the straight line between its ends"""
+    offsets = np.full(len(holes), np.nan)
+    measured = [k for k, hole in enumerate(holes)
+                if fairways[k] is not None and getattr(hole, 'center_line', None) is not None]
+    if not measured:
+        return offsets
+
+    fractions = np.linspace(0, 1, _CORRIDOR_SAMPLES)
+    start = np.array([max(fairways[k][0].min(), 0) for k in measured])
+    end = np.array([fairways[k][0].max() for k in measured])
+    xs = start[:, np.newaxis] + (end - start)[:, np.newaxis] * fractions
+    # the center line is a callable per hole, so sampling it is the one per-hole step
+    ys = np.stack([np.asarray(holes[k].center_line(x), dtype=float) for k, x in zip(measured, xs)])
+    straight = ys[:, :1] + (ys[:, -1:] - ys[:, :1]) * fractions
+    offsets[measured] = np.abs(ys - straight).max(axis=1)
+    return offsets
+
+
+def _elevation_variances(holes):
+    """Variance of each hole's terrain heights, nan without terrain; same-shaped terrains in one pass"""
+    variances = np.full(len(holes), np.nan)
+    shapes = {}
+    for k, hole in enumerate(holes):
+        height_field = getattr(hole, 'height_field', None)
+        if height_field is not None:
+            shapes.setdefault(height_field.heights.shape, []).append(k)
+    for same_shape in shapes.values():
+        heights = np.stack([holes[k].height_field.heights for k in same_shape])
+        variances[same_shape] = np.var(heights, axis=(1, 2), dtype=float)
+    return variances
+
+
+def hole_metrics(holes):
+    """{metric: (n_holes,) array} for a batch of generated holes"""
+    holes = list(holes)
+    n = len(holes)
+    stores = [_feature_store(hole) for hole in holes]
+    areas, ftypes, owners = outline_areas(stores)
+
+    def total_area(types):
+        return np.bincount(owners, weights=areas * np.isin(ftypes, types), minlength=n)
+
+    fairway_area = total_area([FeatureType.FAIRWAY])
+    hazard_area = total_area(HAZARD_TYPES)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        coverage = np.where(fairway_area > 0, hazard_area / fairway_area, np.inf)
+
+    fairways = []
+    for store in stores:
+        fairway = np.flatnonzero(store.ftypes == FeatureType.FAIRWAY)
+        fairways.append(_outline(store, fairway[0]) if len(fairway) else None)
+    corridor = np.zeros(n)
+    with_fairway = [k for k in range(n) if fairways[k] is not None]
+    if with_fairway:
+        corridor[with_fairway] = _corridor_widths(*_padded([fairways[k] for k in with_fairway]))
+
+    return {
+        'fairway_area': fairway_area,
+        'green_area': total_area([FeatureType.GREEN]),
+        'hazard_area': hazard_area,
+        'hazard_coverage': coverage,
+        'min_corridor_width': corridor,
+        'hazards_on_green': _hazards_on_green(stores),
+        'dogleg_offset': _dogleg_offsets(holes, fairways),
+        'elevation_variance': _elevation_variances(holes),
+    }
+
+
+def passes(metrics, constraints=CONSTRAINTS):
+    """Bool array, whether each hole meets every {metric: (minimum, maximum)} constraint"""
+    keep = np.ones(len(next(iter(metrics.values()))), dtype=bool)
+    for name, (minimum, maximum) in constraints.items():
+        values = metrics[name]
+        if minimum is not None:
+            keep &= values >= minimum
+        if maximum is not None:
+            keep &= values <= maximum
+    return keep
+
+
+def filter_holes(holes, constraints=CONSTRAINTS, batch_size: int = 256):
+    """
+    Yield (hole, metrics) for every hole of the iterable that meets `constraints`, where metrics
+    is that hole's {metric: value}. Holes are measured `batch_size` at a time, so `holes` can be
+    an unbounded generator such as batch.iter_holes.
+    """
+    batch = []
+    for hole in holes:
+        batch.append(hole)
+        if len(batch) == batch_size:
+            yield from _kept(batch, constraints)
+            batch = []
+    if batch:
+        yield from _kept(batch, constraints)
+
+
+def _kept(batch, constraints):
+    metrics = hole_metrics(batch)
+    for k in np.flatnonzero(passes(metrics, constraints)):
+        yield batch[k], {name: values[k].item() for name, values in metrics.items()}
+
+
+def main():
+    from batch import generate_courses, hole_seeds
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--holes', type=int, default=1000, help='candidates to generate')
+    parser.add_argument('--workers', type=int, default=None, help='generation processes (default: all cores)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--batch', type=int, default=256, help='holes generated and measured at a time')
+    args = parser.parse_args()
+
+    seeds = hole_seeds(args.holes, args.seed)
+    workers = args.workers or os.cpu_count() or 1
+
+    def candidates(pool):
+        for start in range(0, args.holes, args.batch):
+            chunk = seeds[start:start + args.batch]
+            yield from generate_courses(len(chunk), seeds=chunk, workers=workers, executor=pool)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool: # one pool for every batch
+        kept = sum(1 for _ in filter_holes(candidates(pool), batch_size=args.batch))
+    elapsed = time.perf_counter() - start
+    print(f'kept {kept} of {args.holes} holes in {elapsed:.1f}s ({args.holes / elapsed * 60:.0f} candidates/min)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Hazard placement against an occupancy grid.
+
+Space that is already taken on a hole (tee, green, earlier hazards) is painted into a bool raster.
+Placing a hazard rasterizes its outline once, grown by the required clearance, and tests all
+candidate positions against the raster with one gather, so the cost per hazard depends on its size
+and the number of attempts, not on how many hazards are already down.
+
+Rasters are conservative: an outline takes every cell it covers or touches, and clearance grows it by
+every cell that comes within that distance, so two outlines placed on the grid are always at least
+the clearance apart, not just their cell centres.
+
+    grid = OccupancyGrid.around((0, -80, 400, 80))
+    grid.claim_polygon(green.abs_xx, green.abs_yy)
+    spot = grid.place(rng, trap.xx, trap.yy, propose, clearance=2)
+"""
+import numpy as np
+
+from raster import fill_polygon, outline_cells
+
+
+def _dilate(mask, clearance: float):
+    """
+    Grow a bool mask by every cell with a point closer than `clearance` cells to a point of a set
+    cell; cells (dr, dc) apart are at least max(|dr| - 1, 0) and max(|dc| - 1, 0) apart on each axis.
+    Returns (grown, radius) where the mask is padded by `radius` cells on every side.
+    """
+    if clearance <= 0:
+        return mask, 0
+    radius = int(np.ceil(clearance)) + 1
+    padded = np.pad(mask, radius)
+    grown = np.zeros_like(padded)
+    n_rows, n_cols = padded.shape
+    for dr in range(-radius, radius + 1):
+        for dc in range(-radius, radius + 1):
+            if max(abs(dr) - 1, 0) ** 2 + max(abs(dc) - 1, 0) ** 2 < clearance * clearance:
+                grown[max(dr, 0):n_rows + min(dr, 0), max(dc, 0):n_cols + min(dc, 0)] |= \
+                    padded[max(-dr, 0):n_rows + min(-dr, 0), max(-dc, 0):n_cols + min(-dc, 0)]
+    return grown, radius
+
+
+class OccupancyGrid():
+    """Bool raster of the area already taken; cell (row, col) covers origin + (col, row) * resolution"""
+
+    def __init__(self, origin, shape, resolution: float = 1.0):
+        self.origin = tuple(origin)
+        self.resolution = resolution
+        self.taken = np.zeros(shape, dtype=bool)
+
+
+    @classmethod
+    def around(cls, bounds, resolution: float = 1.0):
+        """Empty grid covering bounds = (min_x, min_y, max_x, max_y)"""
+        min_x, min_y, max_x, max_y = bounds
+        shape = (int(np.ceil((max_y - min_y) / resolution)), int(np.ceil((max_x - min_x) / resolution)))
+        return cls((min_x, min_y), shape, resolution)
+
+
+    def footprint(self, xx, yy, clearance: float = 0):
+        """
+        (mask, offset) of the outline (xx, yy), relative to its own origin and grown by
+        `clearance`; offset is the position of mask cell (0, 0) relative to that origin. The mask
+        holds every cell the outline covers or touches, not only those whose centre it covers.
+        """
+        xx = np.asarray(xx, dtype=float)
+        yy = np.asarray(yy, dtype=float)
+        offset = (np.floor(xx.min() / self.resolution) * self.resolution,
+                  np.floor(yy.min() / self.resolution) * self.resolution)
+        shape = (int(np.ceil((yy.max() - offset[1]) / self.resolution)) + 1,
+                 int(np.ceil((xx.max() - offset[0]) / self.resolution)) + 1)
+        mask = fill_polygon(xx, yy, offset, self.resolution, shape)
+        mask[outline_cells(xx, yy, offset, self.resolution, shape)] = True
+        mask, radius = _dilate(mask, clearance / self.resolution)
+        return mask, (offset[0] - radius * self.resolution, offset[1] - radius * self.resolution)
+
+
+    def snap(self, xs, ys):
+        """Positions moved to the nearest grid corner, where footprints line up with the cells exactly"""
+        xs = self.origin[0] + np.round((np.asarray(xs, dtype=float) - self.origin[0]) / self.resolution) * self.resolution
+        ys = self.origin[1] + np.round((np.asarray(ys, dtype=float) - self.origin[1]) / self.resolution) * self.resolution
+        return xs, ys
+
+
+    def _corners(self, offset, xs, ys):
+        """Grid (row, col) of footprint cell (0, 0) for a footprint placed at each (x, y)"""
+        cols = np.round((np.asarray(xs) + offset[0] - self.origin[0]) / self.resolution).astype(np.int64)
+        rows = np.round((np.asarray(ys) + offset[1] - self.origin[1]) / self.resolution).astype(np.int64)
+        return rows, cols
+
+
+    def fits(self, footprint, xs, ys):
+        """Whether the footprint placed at each (xs, ys) lies on the grid without touching taken cells"""
+        mask, offset = footprint
+        rows, cols = self._corners(offset, np.atleast_1d(xs), np.atleast_1d(ys))
+        height, width = mask.shape
+        n_rows, n_cols = self.taken.shape
+        on_grid = (rows >= 0) & (cols >= 0) & (rows + height <= n_rows) & (cols + width <= n_cols)
+
+        cell_rows, cell_cols = np.nonzero(mask)
+        free = on_grid.copy()
+        if on_grid.any():
+            hit = self.taken[rows[on_grid, np.newaxis] + cell_rows, cols[on_grid, np.newaxis] + cell_cols]
+            free[on_grid] = ~hit.any(axis=1)
+        return free
+
+
+    def claim(self, footprint, x: float, y: float):
+        """Mark the cells under the footprint placed at (x, y) as taken (clipped to the grid)"""
+        mask, offset = footprint
+        row, col = (int(value) for value in self._corners(offset, x, y))
+        height, width = mask.shape
+        top, left = max(row, 0), max(col, 0)
+        bottom, right = min(row + height, self.taken.shape[0]), min(col + width, self.taken.shape[1])
+        if top < bottom and left < right:
+            self.taken[top:bottom, left:right] |= mask[top - row:bottom - row, left - col:right - col]
+
+
+    def claim_polygon(self, xx, yy, clearance: float = 0):
+        """Mark an outline given in absolute coordinates, grown by `clearance`, as taken"""
+        # Relative to the grid origin, so the outline lines up with the cells without snapping
+        xx = np.asarray(xx, dtype=float) - self.origin[0]
+        yy = np.asarray(yy, dtype=float) - self.origin[1]
+        self.claim(self.footprint(xx, yy, clearance), *self.origin)
+
+
+    def place(self, rng: np.random.Generator, xx, yy, propose, clearance: float = 0, attempts: int = 30):
+        """
+        Rejection-sample a position for the outline (xx, yy), given relative to its own origin.
+
+        `propose(rng, n)` returns n candidate (xs, ys) positions. The first candidate whose
+        footprint, grown by `clearance`, is free wins; the outline itself is then claimed and its
+        position returned. Candidates are snapped to the grid first, so the returned position is
+        exactly where the outline was checked and claimed. Returns None when no candidate fits.
+        """
+        xs, ys = self.snap(*propose(rng, attempts))
+        free = np.flatnonzero(self.fits(self.footprint(xx, yy, clearance), xs, ys))
+        if len(free) == 0:
+            return None
+        x, y = float(xs[free[0]]), float(ys[free[0]])
+        self.claim(self.footprint(xx, yy), x, y)
+        return x, y
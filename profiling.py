@@ -0,0 +1,162 @@
+"""
+Per-stage instrumentation for the course generators.
+
+Every generator takes an `instrument` callback. When it is None (the default) stages are plain
+method calls; when set, each stage is timed and reported as a StageRecord:
+
+    collector = StageCollector()
+    CourseGenerator(seed=3, instrument=collector)
+    collector.summary()
+"""
+from dataclasses import dataclass
+import functools
+import threading
+import time
+
+import numpy as np
+
+
+@dataclass
+class StageRecord:
+    generator: str
+    stage: str
+    wall_time: float # seconds
+    cpu_time: float # seconds of process CPU time
+    array_bytes: int # size of the arrays the stage produced
+    spline_fits: int # splprep / CubicSpline fits run during the stage
+
+
+class _FitCounter():
+    count = 0
+
+
+spline_fits = _FitCounter()
+
+
+def count_fits(fit):
+    """Wrap a spline fitting function so run_stage can report how often it ran"""
+    @functools.wraps(fit)
+    def counted(*args, **kwargs):
+        spline_fits.count += 1
+        return fit(*args, **kwargs)
+    return counted
+
+
+def _slot_values(obj):
+    values = []
+    for cls in type(obj).__mro__:
+        slots = getattr(cls, '__slots__', ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name not in ('__dict__', '__weakref__') and hasattr(obj, name):
+                values.append(getattr(obj, name))
+    return values
+
+
+def array_nbytes(obj, _depth: int = 0, _seen=None):
+    """
+    Approximate memory held by the arrays inside obj (features, heightmaps, lie grids, ...).
+    Views are followed to the array that owns the memory and each buffer is counted once.
+    """
+    seen = set() if _seen is None else _seen
+    if isinstance(obj, np.ndarray):
+        while isinstance(obj.base, np.ndarray):
+            obj = obj.base
+        if id(obj) in seen:
+            return 0
+        seen.add(id(obj))
+        return obj.nbytes
+    if _depth > 4 or isinstance(obj, (str, bytes, int, float)):
+        return 0
+    if isinstance(obj, dict):
+        values = obj.values()
+    elif isinstance(obj, (list, tuple)):
+        values = obj
+    else:
+        # an object may have both, e.g. scipy's PPoly keeps its arrays in inherited slots
+        values = list(getattr(obj, '__dict__', {}).values()) + _slot_values(obj)
+    return sum(array_nbytes(value, _depth + 1, seen) for value in values)
+
+
+_running = threading.local() # per thread, [wall, cpu, fits] of the stages nested in each running stage
+
+
+def run_stage(instrument, generator, stage: str, fn, *args):
+    """
+    Call fn(*args), reporting a StageRecord to `instrument` unless it is None.
+
+    Stages may run inside other stages, as when a lazy CourseGenerator builds the inputs a stage
+    asks for. A record covers only its own stage: the time and spline fits of stages nested in it
+    are subtracted, as they have records of their own, so totals over records count nothing twice.
+    """
+    if instrument is None:
+        return fn(*args)
+
+    stack = _running.__dict__.setdefault('stack', [])
+    nested = [0.0, 0.0, 0]
+    stack.append(nested)
+    fits = spline_fits.count
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        result = fn(*args)
+    finally:
+        stack.pop()
+    wall_time = time.perf_counter() - wall_start
+    cpu_time = time.process_time() - cpu_start
+    fit_count = spline_fits.count - fits
+
+    instrument(StageRecord(
+        generator=type(generator).__name__,
+        stage=stage,
+        wall_time=wall_time - nested[0],
+        cpu_time=cpu_time - nested[1],
+        array_bytes=array_nbytes(result),
+        spline_fits=fit_count - nested[2],
+    ))
+    if stack:
+        # the enclosing stage also leaves out the time spent reporting this one
+        parent = stack[-1]
+        parent[0] += time.perf_counter() - wall_start
+        parent[1] += time.process_time() - cpu_start
+        parent[2] += fit_count
+    return result
+
+
+class StageCollector():
+    """Instrument that keeps every record and aggregates them per (generator, stage)"""
+
+    def __init__(self):
+        self.records = []
+        self._lock = threading.Lock()
+
+
+    def __call__(self, record: StageRecord):
+        with self._lock:
+            self.records.append(record)
+
+
+    def summary(self):
+        """{(generator, stage): {'calls', 'wall_time', 'cpu_time', 'array_bytes', 'spline_fits'}} totals"""
+        totals = {}
+        with self._lock:
+            records = list(self.records)
+        for record in records:
+            total = totals.setdefault((record.generator, record.stage),
+                                      {'calls': 0, 'wall_time': 0.0, 'cpu_time': 0.0, 'array_bytes': 0, 'spline_fits': 0})
+            total['calls'] += 1
+            total['wall_time'] += record.wall_time
+            total['cpu_time'] += record.cpu_time
+            total['array_bytes'] += record.array_bytes
+            total['spline_fits'] += record.spline_fits
+        return totals
+
+
+    def clear(self):
+        with self._lock:
+            self.records.clear()
+
+
+def print_stage(record: StageRecord):
+    """Instrument that logs each stage to stdout"""
+    print(f'{record.generator}.{record.stage}: {record.wall_time:.4f}s wall, {record.cpu_time:.4f}s cpu, '
+          f'{record.array_bytes} bytes, {record.spline_fits} spline fits')
@@ -0,0 +1,100 @@
+import numpy as np
+
+
+def _edges(xx, yy):
+    """Edge endpoints of the closed polygon through (xx, yy)"""
+    x0 = np.asarray(xx, dtype=float)
+    y0 = np.asarray(yy, dtype=float)
+    return x0, y0, np.roll(x0, -1), np.roll(y0, -1)
+
+
+def fill_polygon(xx, yy, origin, resolution: float, shape):
+    """
+    Scanline (even-odd) fill of a closed polygon onto a grid.
+
+    Cell (row, col) is inside when its center, origin + (col + 0.5, row + 0.5) * resolution,
+    lies inside the polygon. Rows run along y and columns along x. Every row is filled in one
+    broadcasted pass over all edges, so the cost is O(rows * edges) NumPy work with no Python loop.
+    """
+    n_rows, n_cols = shape
+    x0, y0, x1, y1 = _edges(xx, yy)
+    centers_y = origin[1] + (np.arange(n_rows) + 0.5) * resolution
+
+    # (rows, edges) crossings of each row's center line; half-open so shared vertices count once
+    cy = centers_y[:, np.newaxis]
+    crosses = (y0 <= cy) != (y1 <= cy)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cross_x = x0 + (cy - y0) * (x1 - x0) / (y1 - y0)
+
+    rows, edge_index = np.nonzero(crosses)
+    first_col = np.ceil((cross_x[rows, edge_index] - origin[0]) / resolution - 0.5).astype(np.int64)
+    first_col = np.clip(first_col, 0, n_cols)
+
+    toggles = np.zeros((n_rows, n_cols + 1), dtype=np.int32)
+    np.add.at(toggles, (rows, first_col), 1)
+    return (np.cumsum(toggles[:, :-1], axis=1) & 1).astype(bool)
+
+
+def points_in_polygon(px, py, xx, yy):
+    """Exact even-odd point-in-polygon test for arrays of points (same rule as fill_polygon)"""
+    px = np.asarray(px, dtype=float)
+    py = np.asarray(py, dtype=float)
+    x0, y0, x1, y1 = _edges(xx, yy)
+
+    qx = px.reshape(-1, 1)
+    qy = py.reshape(-1, 1)
+    crosses = (y0 <= qy) != (y1 <= qy)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cross_x = x0 + (qy - y0) * (x1 - x0) / (y1 - y0)
+    inside = np.count_nonzero(crosses & (cross_x < qx), axis=1) & 1
+    return inside.astype(bool).reshape(px.shape)
+
+
+def segment_cells(x0, y0, x1, y1, origin, resolution: float, shape):
+    """
+    (segments, rows, cols) of every grid cell each segment from (x0, y0) to (x1, y1) passes through
+    or touches. A cell may be listed more than once for the same segment.
+    """
+    n_rows, n_cols = shape
+    gx0 = (np.asarray(x0, dtype=float) - origin[0]) / resolution
+    gx1 = (np.asarray(x1, dtype=float) - origin[0]) / resolution
+    gy0 = (np.asarray(y0, dtype=float) - origin[1]) / resolution
+    gy1 = (np.asarray(y1, dtype=float) - origin[1]) / resolution
+    index = np.arange(len(gx0))
+
+    segments = [index, index]
+    rows = [np.floor(gy0), np.floor(gy1)]
+    cols = [np.floor(gx0), np.floor(gx1)]
+    # Every crossing of a segment with a grid line touches the cells on both sides of that line, and
+    # all four cells around it when it meets a grid corner
+    for a0, a1, b0, b1, a_is_col in ((gx0, gx1, gy0, gy1, True), (gy0, gy1, gx0, gx1, False)):
+        first = np.ceil(np.minimum(a0, a1))
+        counts = np.maximum(np.floor(np.maximum(a0, a1)) - first + 1, 0).astype(np.int64)
+        segment = np.repeat(index, counts)
+        line = first[segment] + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+        span = a1[segment] - a0[segment]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = np.where(span != 0, (line - a0[segment]) / span, 0)
+        b = b0[segment] + t * (b1[segment] - b0[segment])
+        b_cell = np.floor(b)
+        corner = b == b_cell
+        for a_cell in (line - 1, line):
+            segments += [segment, segment[corner]]
+            rows += [b_cell, b_cell[corner] - 1] if a_is_col else [a_cell, a_cell[corner]]
+            cols += [a_cell, a_cell[corner]] if a_is_col else [b_cell, b_cell[corner] - 1]
+
+    segments = np.concatenate(segments)
+    rows = np.concatenate(rows).astype(np.int64)
+    cols = np.concatenate(cols).astype(np.int64)
+    on_grid = (rows >= 0) & (rows < n_rows) & (cols >= 0) & (cols < n_cols)
+    return segments[on_grid], rows[on_grid], cols[on_grid]
+
+
+def outline_cells(xx, yy, origin, resolution: float, shape):
+    """
+    (rows, cols) of every grid cell the closed polygon outline passes through or touches. Any
+    other cell lies wholly inside or wholly outside the polygon, however thin the polygon is.
+    """
+    _, rows, cols = segment_cells(*_edges(xx, yy), origin, resolution, shape)
+    return rows, cols
@@ -0,0 +1,159 @@
+"""
+Headless course rendering with NumPy only.
+
+render_course() turns any generated hole into a uint8 RGB array in one vectorized pass: the hole's
+lie grid (scan-filled Feature polygons) is mapped through a colour table and shaded with the
+terrain gradient. write_png() encodes arrays without PIL or matplotlib, and write_thumbnails()
+renders a whole batch of holes to PNG files.
+
+    python render.py --holes 20 --output thumbnails/
+"""
+import argparse
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from lie import GRID_MARGIN, LIE_NAMES, OUT, ROUGH, FAIRWAY, GREEN, TRAP, WATER, TREES
+
+LIE_COLORS = np.zeros((len(LIE_NAMES), 3), dtype=np.uint8)
+LIE_COLORS[OUT] = (24, 24, 24)
+LIE_COLORS[ROUGH] = (46, 110, 60)
+LIE_COLORS[FAIRWAY] = (60, 170, 70)
+LIE_COLORS[GREEN] = (130, 225, 115)
+LIE_COLORS[TRAP] = (238, 214, 160)
+LIE_COLORS[WATER] = (52, 110, 200)
+LIE_COLORS[TREES] = (22, 72, 36)
+
+LIGHT = np.array([-1.0, 1.0, 2.0]) / np.sqrt(6) # from the north-west, above the course
+
+
+def shade_heights(heights, scale: float = 50):
+    """Signed heightmap as an image: green for positive heights, red for negative ones"""
+    heights = np.asarray(heights, dtype=float)
+    rgb = np.zeros(heights.shape + (3,), dtype=np.uint8)
+    rgb[..., 0] = np.clip(-heights * scale, 0, 255)
+    rgb[..., 1] = np.clip(heights * scale, 0, 255)
+    return rgb
+
+
+def hillshade(grad_x, grad_y, strength: float = 1.0):
+    """Brightness factor per cell (1.0 on flat ground) from terrain gradients"""
+    normal_norm = np.sqrt(grad_x**2 + grad_y**2 + 1)
+    lit = (-grad_x * LIGHT[0] - grad_y * LIGHT[1] + LIGHT[2]) / normal_norm
+    return 1 + strength * (lit / LIGHT[2] - 1)
+
+
+def lie_raster(course, pixel_size: float = 1.0):
+    """(lies, origin) covering the course with square cells `pixel_size` yards wide"""
+    if hasattr(course, 'lie_grid'):
+        grid = course.lie_grid(pixel_size)
+        return grid.lies, grid.origin
+
+    # GolfCourse has no polygons, only a lie_at over its own grid
+    xs = (np.arange(int(np.ceil(course.grid_x / pixel_size))) + 0.5) * pixel_size
+    zs = (np.arange(int(np.ceil(course.grid_z / pixel_size))) + 0.5) * pixel_size
+    return course.lie_at(xs[np.newaxis, :], zs[:, np.newaxis]), (0.0, 0.0)
+
+
+def lie_raster_width(course):
+    """Yards across the area lie_raster covers, from the hole's outlines rather than a raster"""
+    if not hasattr(course, 'lie_grid'):
+        return course.grid_x
+    store = getattr(course, 'feature_store', None)
+    if store is not None:
+        bounds = store.bounds()
+        min_x, max_x = bounds[:, 0].min(), bounds[:, 2].max()
+    else: # course_gen_v2.Course paints its rough, fairway and green
+        xx = np.concatenate([course.rough[0], course.fairway[0], course.green[0]])
+        min_x, max_x = xx.min(), xx.max()
+    return max_x - min_x + 2 * GRID_MARGIN
+
+
+def render_course(course, pixel_size: float = 1.0, shading: float = 1.0, raster=None):
+    """
+    RGB image (rows, cols, 3) of a hole, one pixel per `pixel_size` yards.
+
+    The first row is the top of the image, i.e. the largest y, so the hole reads as it does in the
+    matplotlib previews. Terrain shading is applied when the course has a height_field. Pass the
+    (lies, origin) of lie_raster(course, pixel_size) as `raster` when it is already at hand.
+    """
+    lies, origin = lie_raster(course, pixel_size) if raster is None else raster
+    rgb = LIE_COLORS[lies]
+
+    height_field = getattr(course, 'height_field', None)
+    if height_field is not None and shading:
+        n_rows, n_cols = lies.shape
+        xs = origin[0] + (np.arange(n_cols) + 0.5) * pixel_size
+        ys = origin[1] + (np.arange(n_rows) + 0.5) * pixel_size
+        grad_x, grad_y = height_field.gradient(xs[np.newaxis, :], ys[:, np.newaxis])
+        light = hillshade(grad_x, grad_y, shading)
+        rgb = np.clip(rgb * light[..., np.newaxis], 0, 255).astype(np.uint8)
+
+    return rgb[::-1]
+
+
+def fit_image(rgb, max_size: int):
+    """Nearest-neighbour downsample so neither side exceeds max_size pixels"""
+    n_rows, n_cols = rgb.shape[:2]
+    scale = max(n_rows, n_cols) / max_size
+    if scale <= 1:
+        return rgb
+    rows = (np.arange(int(n_rows / scale)) * scale).astype(np.int64)
+    cols = (np.arange(int(n_cols / scale)) * scale).astype(np.int64)
+    return rgb[rows[:, np.newaxis], cols[np.newaxis, :]]
+
+
+def _png_chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+
+def encode_png(rgb, compression: int = 6):
+    """PNG bytes of a uint8 (rows, cols, 3) image"""
+    rgb = np.ascontiguousarray(rgb, dtype=np.uint8)
+    n_rows, n_cols = rgb.shape[:2]
+    scanlines = np.zeros((n_rows, n_cols * 3 + 1), dtype=np.uint8) # leading 0 = no filter
+    scanlines[:, 1:] = rgb.reshape(n_rows, n_cols * 3)
+
+    header = struct.pack('>IIBBBBB', n_cols, n_rows, 8, 2, 0, 0, 0) # 8-bit truecolour
+    return (b'\x89PNG\r\n\x1a\n'
+            + _png_chunk(b'IHDR', header)
+            + _png_chunk(b'IDAT', zlib.compress(scanlines.tobytes(), compression))
+            + _png_chunk(b'IEND', b''))
+
+
+def write_png(path, rgb, compression: int = 6):
+    with open(path, 'wb') as file:
+        file.write(encode_png(rgb, compression))
+
+
+def write_thumbnails(courses, directory, max_size: int = 256, pixel_size: float = 1.0, prefix: str = 'hole'):
+    """Render every course to `directory`/<prefix>_<i>.png, returns the written paths"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i, course in enumerate(courses):
+        path = os.path.join(directory, f'{prefix}_{i:05d}.png')
+        write_png(path, fit_image(render_course(course, pixel_size), max_size))
+        paths.append(path)
+    return paths
+
+
+def main():
+    from batch import generate_courses
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--holes', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--length', type=int, default=350)
+    parser.add_argument('--max-size', type=int, default=256)
+    parser.add_argument('--output', default='thumbnails')
+    args = parser.parse_args()
+
+    courses = generate_courses(args.holes, seeds=args.seed, length=args.length)
+    paths = write_thumbnails(courses, args.output, max_size=args.max_size)
+    print(f'Wrote {len(paths)} thumbnails to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""
+Asyncio front end for course generation.
+
+Generation is CPU-bound, so builds run in a bounded process pool and the event loop only awaits
+them. Concurrent requests for the same hole (same generator, parameters and seed) share one build.
+When more than `max_queue` builds are waiting for a worker, new requests fail fast with
+ServiceOverloaded instead of queueing without bound, and every build is subject to `timeout`.
+Builds still waiting for a worker when the service closes fail with RuntimeError.
+
+    async with CourseService(workers=4) as service:
+        hole = await service.generate(seed=7, par=4)
+        service.metrics()
+
+LocalClient talks to a service in the same process, with the interface a remote client would
+have, so game code can be exercised without a backend. `python service.py` runs a small burst.
+"""
+import asyncio
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import functools
+import os
+import time
+
+import numpy as np
+
+from batch import build_hole
+from cache import hole_key
+from course_gen_v3 import CourseGenerator
+from world import PAR_LENGTHS
+
+
+class ServiceOverloaded(RuntimeError):
+    """Raised when the build queue is full"""
+
+
+class CourseService():
+    """
+    Coalescing, bounded generation service. Use as an async context manager, or call start()
+    and close() around its use.
+
+    With in_process=True builds run on threads instead of processes, which keeps everything in
+    one process for tests and local tools at the cost of parallelism.
+    """
+
+    def __init__(self, workers: int = None, max_queue: int = 64, timeout: float = 30.0,
+                 generator=CourseGenerator, in_process: bool = False, latency_window: int = 1024):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.timeout = timeout # seconds per build, from the moment it starts on a worker
+        self.generator = generator
+        self.in_process = in_process
+
+        self._executor = None
+        self._slots = None # semaphore of free workers, created on the running loop
+        self._inflight = {} # hole key -> future shared by every request for that hole
+        self._latencies = deque(maxlen=latency_window) # seconds per request, most recent last
+
+        self.queue_depth = 0 # builds waiting for a worker
+        self.running = 0 # builds on a worker
+        self.requests = 0
+        self.coalesced = 0
+        self.builds = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.rejected = 0
+
+
+    async def start(self):
+        if self._executor is None:
+            executor = ThreadPoolExecutor if self.in_process else ProcessPoolExecutor
+            self._executor = executor(max_workers=self.workers)
+            self._slots = asyncio.Semaphore(self.workers)
+        return self
+
+
+    async def close(self):
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.get_running_loop().run_in_executor(None, functools.partial(executor.shutdown, cancel_futures=True))
+
+
+    async def __aenter__(self):
+        return await self.start()
+
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+    def _params(self, length, par, params):
+        if par is not None:
+            if length is not None:
+                raise ValueError("pass either length or par, not both")
+            length = PAR_LENGTHS[par]
+        if length is not None:
+            params = dict(params, length=length)
+        return params
+
+
+    async def generate(self, seed: int, length: int = None, par: int = None, **params):
+        """
+        The hole for (seed, length or par, params). Concurrent calls for the same hole await the
+        same build. Raises ServiceOverloaded when the queue is full and TimeoutError when the
+        build runs past the timeout.
+        """
+        if self._executor is None:
+            raise RuntimeError("service is not started")
+        params = self._params(length, par, params)
+        key = hole_key(self.generator, seed, params)
+        start = time.perf_counter()
+        self.requests += 1
+
+        build = self._inflight.get(key)
+        if build is not None:
+            self.coalesced += 1
+        else:
+            if self.queue_depth >= self.max_queue:
+                self.rejected += 1
+                raise ServiceOverloaded(f"{self.queue_depth} builds already queued")
+            self.queue_depth += 1 # counted now, not when the task first runs, so a burst sees itself
+            build = asyncio.ensure_future(self._build(seed, params))
+            self._inflight[key] = build
+            build.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        try:
+            # shielded, so one caller giving up does not cancel the build for the others
+            return await asyncio.shield(build)
+        finally:
+            self._latencies.append(time.perf_counter() - start)
+
+
+    async def _build(self, seed, params):
+        loop = asyncio.get_running_loop()
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queue_depth -= 1
+        if self._executor is None:
+            # closed while this build waited; run_in_executor(None, ...) would quietly run it here
+            self._slots.release()
+            self.failures += 1
+            raise RuntimeError("service closed before the build started")
+
+        # Holding a slot means a worker is idle, so the job starts right away and the timeout
+        # runs from its start. The slot is only given back once the worker is done with the job,
+        # even when every caller has stopped waiting, so a timed-out build still occupies it.
+        self.running += 1
+        job = functools.partial(build_hole, self.generator, seed=seed, **params)
+        work = loop.run_in_executor(self._executor, job)
+        work.add_done_callback(self._worker_done)
+        try:
+            # shielded, so timing out does not cancel `work` and free the slot early
+            hole = await asyncio.wait_for(asyncio.shield(work), self.timeout)
+            self.builds += 1
+            return hole
+        except asyncio.TimeoutError:
+            # the worker cannot be interrupted; it finishes in the background and its result is dropped
+            self.timeouts += 1
+            raise
+        except Exception:
+            self.failures += 1
+            raise
+
+
+    def _worker_done(self, work):
+        if not work.cancelled():
+            work.exception() # retrieved here, so a dropped result does not log "never retrieved"
+        self.running -= 1
+        self._slots.release()
+
+
+    def metrics(self):
+        """Counters, current queue depth and request latency percentiles (milliseconds)"""
+        latencies = np.array(self._latencies) * 1e3
+        percentile = (lambda q: float(np.percentile(latencies, q))) if len(latencies) else (lambda q: None)
+        return {
+            'queue_depth': self.queue_depth,
+            'running': self.running,
+            'requests': self.requests,
+            'coalesced': self.coalesced,
+            'builds': self.builds,
+            'failures': self.failures,
+            'timeouts': self.timeouts,
+            'rejected': self.rejected,
+            'latency_p50_ms': percentile(50),
+            'latency_p99_ms': percentile(99),
+        }
+
+
+class LocalClient():
+    """In-process stand-in for a remote generation client"""
+
+    def __init__(self, service: CourseService):
+        self.service = service
+
+
+    async def generate(self, seed: int, length: int = None, par: int = None, **params):
+        return await self.service.generate(seed, length=length, par=par, **params)
+
+
+    async def generate_many(self, requests):
+        """Results (or exceptions) for a list of {'seed': ..., 'par': ..., ...} requests, in order"""
+        return await asyncio.gather(*(self.generate(**request) for request in requests), return_exceptions=True)
+
+
+    async def metrics(self):
+        return self.service.metrics()
+
+
+async def _demo():
+    async with CourseService(workers=4) as service:
+        client = LocalClient(service)
+        # 40 requests for 10 distinct holes: duplicates share builds
+        requests = [{'seed': i % 10, 'par': (3, 4, 5)[i % 10 % 3]} for i in range(40)]
+        start = time.perf_counter()
+        holes = await client.generate_many(requests)
+        print(f'{len(holes)} requests in {time.perf_counter() - start:.2f}s')
+        print(await client.metrics())
+
+
+def main():
+    asyncio.run(_demo())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from lie import LIE_NAMES, OUT, ROUGH, FAIRWAY, GREEN, TRAP, WATER, TREES
+
+GRAVITY = 10.73 # yards / s^2
+AIR_DRAG = 0.0044 # quadratic drag coefficient of a golf ball, 1 / yard (lift is not modelled)
+STOP_SPEED = 0.05 # yards / s, a rolling ball slower than this has stopped
+
+# Per-lie rolling resistance (fraction of gravity) and share of horizontal speed kept on landing
+LIE_FRICTION = np.zeros(len(LIE_NAMES))
+LIE_FRICTION[[OUT, ROUGH, FAIRWAY, GREEN, TRAP, WATER, TREES]] = (1.0, 0.9, 0.45, 0.2, 1.0, 1.0, 1.0)
+LIE_LANDING_SPEED = np.zeros(len(LIE_NAMES))
+LIE_LANDING_SPEED[[OUT, ROUGH, FAIRWAY, GREEN, TRAP, WATER, TREES]] = (0.0, 0.15, 0.35, 0.3, 0.0, 0.0, 0.05)
+DEAD_LIES = [OUT, WATER] # a ball that reaches these stops where it is
+
+
+@dataclass
+class ShotResult:
+    landing_xs: np.ndarray
+    landing_ys: np.ndarray
+    landing_lies: np.ndarray
+    final_xs: np.ndarray
+    final_ys: np.ndarray
+    final_lies: np.ndarray
+    flight_time: np.ndarray
+    roll_time: np.ndarray
+
+
+class ShotSimulator():
+    """
+    Integrates flight and roll for a batch of shots over one course.
+
+    The course must provide lie_at(xs, ys). If it also has a `height_field` (terrain.HeightField)
+    the ball lands on and rolls down the terrain, otherwise the ground is flat at height 0. Each
+    step advances every ball still in play with NumPy array updates, so cost scales with the
+    number of steps rather than the number of shots.
+    """
+
+    def __init__(self, course, dt: float = 0.02, max_time: float = 30.0):
+        self.course = course
+        self.dt = dt
+        self.max_steps = int(max_time / dt)
+        self.height_field = getattr(course, 'height_field', None)
+
+
+    def _ground(self, xs, ys):
+        if self.height_field is None:
+            return np.zeros(np.shape(xs))
+        return self.height_field.sample(xs, ys)
+
+
+    def _slope(self, xs, ys):
+        if self.height_field is None:
+            return np.zeros(np.shape(xs)), np.zeros(np.shape(ys))
+        return self.height_field.gradient(xs, ys)
+
+
+    def _fly(self, pos, vel):
+        """Advance until every ball is below the ground; returns landing times"""
+        n = len(pos)
+        flight_time = np.full(n, self.max_steps * self.dt)
+        active = np.arange(n)
+        for step in range(1, self.max_steps + 1):
+            p = pos[active]
+            v = vel[active]
+            speed = np.linalg.norm(v, axis=1, keepdims=True)
+            accel = -AIR_DRAG * speed * v
+            accel[:, 2] -= GRAVITY
+            v += accel * self.dt
+            p += v * self.dt
+            pos[active] = p
+            vel[active] = v
+
+            landed = p[:, 2] <= self._ground(p[:, 0], p[:, 1])
+            if landed.any():
+                flight_time[active[landed]] = step * self.dt
+                active = active[~landed]
+            if len(active) == 0:
+                break
+        return flight_time
+
+
+    def _roll(self, pos, vel, lies):
+        """Roll balls along the terrain until they stop; returns roll times"""
+        n = len(pos)
+        roll_time = np.full(n, self.max_steps * self.dt)
+        active = np.nonzero(np.hypot(vel[:, 0], vel[:, 1]) > STOP_SPEED)[0]
+        roll_time[np.setdiff1d(np.arange(n), active)] = 0
+        for step in range(1, self.max_steps + 1):
+            if len(active) == 0:
+                break
+            p = pos[active]
+            v = vel[active]
+            friction = LIE_FRICTION[lies[active]] * GRAVITY
+            slope_x, slope_y = self._slope(p[:, 0], p[:, 1])
+
+            # Friction can slow a ball to a stop but never reverse it; the slope then pulls it on
+            speed = np.hypot(v[:, 0], v[:, 1])
+            v[:, :2] *= np.maximum(0, 1 - friction * self.dt / speed)[:, np.newaxis]
+            v[:, 0] -= GRAVITY * slope_x * self.dt
+            v[:, 1] -= GRAVITY * slope_y * self.dt
+            p += v * self.dt
+            lies[active] = self.course.lie_at(p[:, 0], p[:, 1])
+            pos[active] = p
+            vel[active] = v
+
+            stopped = (np.hypot(v[:, 0], v[:, 1]) < STOP_SPEED) | np.isin(lies[active], DEAD_LIES)
+            if stopped.any():
+                roll_time[active[stopped]] = step * self.dt
+                active = active[~stopped]
+        return roll_time
+
+
+    def simulate(self, speed, launch_angle, heading, start_xs=0.0, start_ys=0.0):
+        """
+        Simulate N shots. `speed` is in yards/s, `launch_angle` (above horizontal) and `heading`
+        (from the +x axis towards +y) in radians; arguments broadcast against each other.
+        """
+        speed, launch_angle, heading, start_xs, start_ys = np.broadcast_arrays(
+            *(np.asarray(value, dtype=float) for value in (speed, launch_angle, heading, start_xs, start_ys)))
+        speed, launch_angle, heading = speed.ravel(), launch_angle.ravel(), heading.ravel()
+
+        pos = np.column_stack([start_xs.ravel(), start_ys.ravel(), np.zeros(speed.size)])
+        pos[:, 2] = self._ground(pos[:, 0], pos[:, 1])
+        horizontal = speed * np.cos(launch_angle)
+        vel = np.column_stack([horizontal * np.cos(heading), horizontal * np.sin(heading), speed * np.sin(launch_angle)])
+
+        # Putts and other shots struck along the ground never leave it: no flight, no landing loss
+        airborne = np.flatnonzero(vel[:, 2] > 0)
+        flight_time = np.zeros(speed.size)
+        if len(airborne):
+            flying_pos, flying_vel = pos[airborne], vel[airborne]
+            flight_time[airborne] = self._fly(flying_pos, flying_vel)
+            pos[airborne], vel[airborne] = flying_pos, flying_vel
+        landing_lies = np.asarray(self.course.lie_at(pos[:, 0], pos[:, 1]), dtype=np.uint8)
+        landing = pos[:, :2].copy()
+
+        vel[:, 2] = 0
+        vel[airborne, :2] *= LIE_LANDING_SPEED[landing_lies[airborne], np.newaxis]
+        lies = landing_lies.copy()
+        roll_time = self._roll(pos, vel, lies)
+
+        return ShotResult(
+            landing_xs=landing[:, 0],
+            landing_ys=landing[:, 1],
+            landing_lies=landing_lies,
+            final_xs=pos[:, 0],
+            final_ys=pos[:, 1],
+            final_lies=lies,
+            flight_time=flight_time,
+            roll_time=roll_time,
+        )
+
+
+def simulate_shots(course, speed, launch_angle, heading, start_xs=0.0, start_ys=0.0, dt: float = 0.02):
+    """Convenience wrapper around ShotSimulator(course, dt).simulate(...)"""
+    return ShotSimulator(course, dt=dt).simulate(speed, launch_angle, heading, start_xs, start_ys)
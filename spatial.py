@@ -0,0 +1,299 @@
+"""
+Spatial index over the features of one hole.
+
+Features are registered in a uniform grid whose cells list, in CSR form, the features with a
+bounding box overlapping them. A query only visits the cells it touches (the cell of a point, the
+cells along a segment, or rings of cells growing around a point until no unseen feature can be
+nearer), so its cost follows the features near it rather than all the features of the hole. Exact
+polygon and edge tests run only on the (query, feature) pairs found that way. Every query is batched
+over arrays of points or segments:
+
+    index = course.spatial_index
+    index.contains(xs, ys)                                     # (points, features) point-in-feature
+    index.crosses(x0, y0, x1, y1, ftypes=[FeatureType.TRAP])   # does each shot line touch a trap?
+    index.nearest(xs, ys, k=2)                                 # two nearest features and distances
+"""
+import numpy as np
+
+from features import FeatureStore, FeatureType
+from raster import points_in_polygon, segment_cells
+
+_CHUNK = 4096 # queries per block in the (queries, edges) tests
+
+
+def _edges(xx, yy):
+    """Edge endpoints of the closed outline through (xx, yy)"""
+    return xx, yy, np.roll(xx, -1), np.roll(yy, -1)
+
+
+def _segments_cross(x0, y0, x1, y1, xx, yy):
+    """(segments, edges) bool, whether segment i touches edge j of the outline through (xx, yy)"""
+    ex0, ey0, ex1, ey1 = _edges(xx, yy)
+    x0, y0, x1, y1 = (value[:, np.newaxis] for value in (x0, y0, x1, y1))
+
+    def orientation(ax, ay, bx, by, px, py):
+        return np.sign((bx - ax) * (py - ay) - (by - ay) * (px - ax))
+
+    return ((orientation(x0, y0, x1, y1, ex0, ey0) * orientation(x0, y0, x1, y1, ex1, ey1) <= 0) &
+            (orientation(ex0, ey0, ex1, ey1, x0, y0) * orientation(ex0, ey0, ex1, ey1, x1, y1) <= 0))
+
+
+def _outline_distance(px, py, xx, yy):
+    """Distance from each point to the closest point of the outline through (xx, yy)"""
+    ex0, ey0, ex1, ey1 = _edges(xx, yy)
+    dx, dy = ex1 - ex0, ey1 - ey0
+    length2 = dx * dx + dy * dy
+    qx = px[:, np.newaxis] - ex0
+    qy = py[:, np.newaxis] - ey0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.clip(np.where(length2 > 0, (qx * dx + qy * dy) / length2, 0), 0, 1)
+    return np.hypot(qx - t * dx, qy - t * dy).min(axis=1)
+
+
+def _by_feature(features):
+    """(feature, positions in `features`) for every feature that occurs in it"""
+    order = np.argsort(features, kind='stable')
+    unique, starts = np.unique(features[order], return_index=True)
+    return zip(unique, np.split(order, starts[1:]))
+
+
+def _ring(radius: int):
+    """(row, col) offsets of the cells at Chebyshev distance `radius` from a cell"""
+    offsets = np.mgrid[-radius:radius + 1, -radius:radius + 1].reshape(2, -1).T
+    return offsets[np.abs(offsets).max(axis=1) == radius]
+
+
+class FeatureIndex():
+    """
+    Uniform grid of feature bounding boxes for one hole.
+
+    Features are numbered as in the FeatureStore, and queries return those indices; `store[i]`
+    gives the Feature itself. A point inside a feature is at distance 0 from it.
+    """
+
+    def __init__(self, store: FeatureStore, cell_size: float = 10.0):
+        self.store = store
+        self.cell_size = cell_size
+        self.bounds = store.bounds() # (features, 4) min_x, min_y, max_x, max_y
+        self.ftypes = store.ftypes
+
+        abs_xx, abs_yy = store.abs_xx, store.abs_yy
+        self.outlines = [(abs_xx[start:end], abs_yy[start:end])
+                         for start, end in zip(store.offsets[:-1], store.offsets[1:])]
+
+        n_features = len(store)
+        if n_features:
+            self.origin = tuple(self.bounds[:, :2].min(axis=0))
+            extent = self.bounds[:, 2:].max(axis=0) - self.origin
+        else:
+            self.origin, extent = (0.0, 0.0), np.zeros(2)
+        self.shape = (int(extent[1] // cell_size) + 1, int(extent[0] // cell_size) + 1)
+
+        # (features, 2) (col, row) of the first and last cell each bounding box overlaps
+        self.low = np.floor((self.bounds[:, :2] - self.origin) / cell_size).astype(np.int64)
+        self.high = np.floor((self.bounds[:, 2:] - self.origin) / cell_size).astype(np.int64)
+
+        # The features of flat cell c (row * cols + col) are cell_features[cell_start[c]:cell_start[c + 1]]
+        cells, features = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)]
+        for i, ((col0, row0), (col1, row1)) in enumerate(zip(self.low, self.high)):
+            rows, cols = np.mgrid[row0:row1 + 1, col0:col1 + 1]
+            cells.append((rows * self.shape[1] + cols).ravel())
+            features.append(np.full(rows.size, i))
+        cells, features = np.concatenate(cells), np.concatenate(features)
+        self.cell_features = features[np.argsort(cells, kind='stable')]
+        n_cells = self.shape[0] * self.shape[1]
+        self.cell_start = np.concatenate([[0], np.cumsum(np.bincount(cells, minlength=n_cells))])
+
+
+    @classmethod
+    def from_features(cls, features, cell_size: float = 10.0):
+        return cls(FeatureStore.from_features(features), cell_size=cell_size)
+
+
+    def __len__(self):
+        return len(self.store)
+
+
+    def _selected(self, ftypes):
+        """Bool mask of the features whose type is in `ftypes` (all features when None)"""
+        if ftypes is None:
+            return np.ones(len(self), dtype=bool)
+        return np.isin(self.ftypes, [FeatureType.of(ftype) for ftype in ftypes])
+
+
+    def _in_bounds(self, xs, ys, i):
+        min_x, min_y, max_x, max_y = self.bounds[i]
+        return (xs >= min_x) & (xs <= max_x) & (ys >= min_y) & (ys <= max_y)
+
+
+    def _cells(self, xs, ys):
+        """(rows, cols) of the cell each point is in; off the grid when outside it"""
+        cols = np.floor((xs - self.origin[0]) / self.cell_size).astype(np.int64)
+        rows = np.floor((ys - self.origin[1]) / self.cell_size).astype(np.int64)
+        return rows, cols
+
+
+    def _pairs(self, queries, rows, cols, selected, near=None):
+        """
+        Unique (query, feature) pairs of the selected features listed in cells (rows, cols), keeping
+        only those for which near(queries, features) is true when it is given
+        """
+        starts = self.cell_start[rows * self.shape[1] + cols]
+        counts = self.cell_start[rows * self.shape[1] + cols + 1] - starts
+        positions = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        query, feature = np.repeat(queries, counts), self.cell_features[positions]
+        keep = selected[feature]
+        query, feature = query[keep], feature[keep]
+        if near is not None:
+            keep = near(query, feature)
+            query, feature = query[keep], feature[keep]
+        keys = np.unique(query * len(self) + feature)
+        return keys // len(self), keys % len(self)
+
+
+    def contains(self, xs, ys, ftypes=None):
+        """Bool array of shape xs.shape + (features,): whether each point lies inside each feature"""
+        xs, ys = np.broadcast_arrays(np.asarray(xs, dtype=float), np.asarray(ys, dtype=float))
+        shape = xs.shape
+        xs, ys = xs.ravel(), ys.ravel()
+
+        inside = np.zeros((len(xs), len(self)), dtype=bool)
+        if not len(self):
+            return inside.reshape(*shape, 0)
+        rows, cols = self._cells(xs, ys)
+        on_grid = (rows >= 0) & (rows < self.shape[0]) & (cols >= 0) & (cols < self.shape[1])
+        points, features = self._pairs(np.flatnonzero(on_grid), rows[on_grid], cols[on_grid], self._selected(ftypes))
+
+        for i, pairs in _by_feature(features):
+            candidates = points[pairs]
+            candidates = candidates[self._in_bounds(xs[candidates], ys[candidates], i)]
+            for start in range(0, len(candidates), _CHUNK):
+                block = candidates[start:start + _CHUNK]
+                inside[block, i] = points_in_polygon(xs[block], ys[block], *self.outlines[i])
+        return inside.reshape(*shape, len(self))
+
+
+    def features_at(self, x: float, y: float, ftypes=None):
+        """Features containing the point (x, y)"""
+        return [self.store[i] for i in np.flatnonzero(self.contains(x, y, ftypes))]
+
+
+    def crosses(self, x0, y0, x1, y1, ftypes=None):
+        """
+        Bool array of shape (segments,) + (features,): whether the segment from (x0, y0) to
+        (x1, y1) touches each feature, by crossing its outline or starting inside it.
+        """
+        x0, y0, x1, y1 = np.broadcast_arrays(*(np.asarray(value, dtype=float) for value in (x0, y0, x1, y1)))
+        shape = x0.shape
+        x0, y0, x1, y1 = x0.ravel(), y0.ravel(), x1.ravel(), y1.ravel()
+
+        hits = self.contains(x0, y0, ftypes)
+        if not len(self):
+            return hits.reshape(*shape, 0)
+        def near(segments, features):
+            """Whether the bounding boxes of segment and feature overlap"""
+            min_x, min_y, max_x, max_y = self.bounds[features].T
+            return ((np.minimum(x0[segments], x1[segments]) <= max_x) & (np.maximum(x0[segments], x1[segments]) >= min_x) &
+                    (np.minimum(y0[segments], y1[segments]) <= max_y) & (np.maximum(y0[segments], y1[segments]) >= min_y))
+
+        segments, rows, cols = segment_cells(x0, y0, x1, y1, self.origin, self.cell_size, self.shape)
+        segments, features = self._pairs(segments, rows, cols, self._selected(ftypes), near)
+
+        for i, pairs in _by_feature(features):
+            candidates = segments[pairs]
+            candidates = candidates[~hits[candidates, i]]
+            for start in range(0, len(candidates), _CHUNK):
+                block = candidates[start:start + _CHUNK]
+                hits[block, i] = _segments_cross(x0[block], y0[block], x1[block], y1[block],
+                                                 *self.outlines[i]).any(axis=1)
+        return hits.reshape(*shape, len(self))
+
+
+    def _distances(self, xs, ys, points, features):
+        """Exact distance from point points[j] to feature features[j]"""
+        distances = np.empty(len(points))
+        for i, pairs in _by_feature(features):
+            px, py = xs[points[pairs]], ys[points[pairs]]
+            distance = _outline_distance(px, py, *self.outlines[i])
+            distance[points_in_polygon(px, py, *self.outlines[i])] = 0
+            distances[pairs] = distance
+        return distances
+
+
+    def nearest(self, xs, ys, k: int = 1, ftypes=None):
+        """
+        (indices, distances) of the k nearest features to each point, each of shape xs.shape + (k,)
+        and sorted by distance. Missing neighbours (fewer than k features) are -1 at distance inf.
+        """
+        xs, ys = np.broadcast_arrays(np.asarray(xs, dtype=float), np.asarray(ys, dtype=float))
+        shape = xs.shape
+        xs, ys = xs.ravel(), ys.ravel()
+        k = max(k, 0)
+
+        indices = np.full((len(xs), k), -1, dtype=np.int64)
+        distances = np.full((len(xs), k), np.inf)
+        if k and len(self):
+            selected = self._selected(ftypes)
+            for start in range(0, len(xs), _CHUNK):
+                block = slice(start, start + _CHUNK)
+                self._nearest(xs[block], ys[block], selected, indices[block], distances[block])
+        return indices.reshape(*shape, k), distances.reshape(*shape, k)
+
+
+    def _nearest(self, xs, ys, selected, indices, distances):
+        """Ring search filling the (points, k) `indices` and `distances` in place"""
+        n_rows, n_cols = self.shape
+        k = indices.shape[1]
+        rows, cols = self._cells(xs, ys)
+        rows, cols = np.clip(rows, 0, n_rows - 1), np.clip(cols, 0, n_cols - 1) # off-grid points start at the edge
+        min_x, min_y, max_x, max_y = self.bounds.T
+        active = np.arange(len(xs))
+
+        for radius in range(max(self.shape)):
+            ring = _ring(radius)
+            points = np.repeat(active, len(ring))
+            ring_rows = rows[points] + np.tile(ring[:, 0], len(active))
+            ring_cols = cols[points] + np.tile(ring[:, 1], len(active))
+            on_grid = (ring_rows >= 0) & (ring_rows < n_rows) & (ring_cols >= 0) & (ring_cols < n_cols)
+
+            def near(points, features):
+                """
+                Whether this ring is the first to list the feature (its bounding box starts here) and
+                the box is no farther from the point than the current k-th neighbour
+                """
+                low, high = self.low[features], self.high[features]
+                gap_cols = np.maximum(np.maximum(low[:, 0] - cols[points], cols[points] - high[:, 0]), 0)
+                gap_rows = np.maximum(np.maximum(low[:, 1] - rows[points], rows[points] - high[:, 1]), 0)
+                px, py = xs[points], ys[points]
+                lower = np.hypot(np.maximum(np.maximum(min_x[features] - px, px - max_x[features]), 0),
+                                 np.maximum(np.maximum(min_y[features] - py, py - max_y[features]), 0))
+                return (np.maximum(gap_cols, gap_rows) == radius) & (lower <= distances[points, -1])
+
+            points, features = self._pairs(points[on_grid], ring_rows[on_grid], ring_cols[on_grid], selected, near)
+
+            if len(points):
+                found = self._distances(xs, ys, points, features)
+                touched = np.unique(points)
+                merged_points = np.concatenate([np.repeat(touched, k), points])
+                merged_features = np.concatenate([indices[touched].ravel(), features])
+                merged_distances = np.concatenate([distances[touched].ravel(), found])
+                order = np.lexsort((merged_features, merged_distances, merged_points))
+                merged_points = merged_points[order]
+                rank = np.arange(len(order)) - np.searchsorted(merged_points, merged_points)
+                first_k = rank < k
+                indices[merged_points[first_k], rank[first_k]] = merged_features[order][first_k]
+                distances[merged_points[first_k], rank[first_k]] = merged_distances[order][first_k]
+
+            # Every feature not seen yet lies outside the searched square of cells, so at least as far
+            # as its nearest side; sides that reached the edge of the grid have nothing beyond them
+            bound = np.full(len(active), np.inf)
+            row, col, x, y = rows[active], cols[active], xs[active], ys[active]
+            for side, distance in (
+                    (row - radius > 0, y - (self.origin[1] + (row - radius) * self.cell_size)),
+                    (row + radius + 1 < n_rows, self.origin[1] + (row + radius + 1) * self.cell_size - y),
+                    (col - radius > 0, x - (self.origin[0] + (col - radius) * self.cell_size)),
+                    (col + radius + 1 < n_cols, self.origin[0] + (col + radius + 1) * self.cell_size - x)):
+                bound = np.where(side, np.minimum(bound, distance), bound)
+            active = active[(distances[active, -1] >= bound) & np.isfinite(bound)]
+            if not len(active):
+                break
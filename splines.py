@@ -0,0 +1,130 @@
+"""
+Batched closed-curve smoothing.
+
+A periodic cubic B-spline through n points with a uniform parameter is a linear map from the
+points to the sampled curve, so for a given (n, resolution) it is one precomputed matrix. Smoothing
+any number of outlines with the same point count is then a single matrix multiply instead of a
+splprep/splev round trip per outline.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+
+def _basis(s):
+    """Uniform cubic B-spline weights of control points i-1, i, i+1, i+2 at local parameter s"""
+    s2 = s * s
+    s3 = s2 * s
+    return np.stack([
+        (1 - s)**3,
+        3 * s3 - 6 * s2 + 4,
+        -3 * s3 + 3 * s2 + 3 * s + 1,
+        s3,
+    ], axis=-1) / 6
+
+
+@lru_cache(maxsize=64)
+def closed_curve_matrix(n_points: int, resolution: int):
+    """
+    (resolution, n_points) matrix mapping the vertices of a closed outline to `resolution` samples
+    of the interpolating periodic cubic spline, at parameters linspace(0, 1, resolution) like splev.
+    """
+    if n_points < 3:
+        raise ValueError("a closed curve needs at least 3 points")
+
+    # Control points C solve (C[i-1] + 4 C[i] + C[i+1]) / 6 = P[i], a circulant system
+    index = np.arange(n_points)
+    interpolation = np.zeros((n_points, n_points))
+    interpolation[index, (index - 1) % n_points] = 1 / 6
+    interpolation[index, index] = 4 / 6
+    interpolation[index, (index + 1) % n_points] = 1 / 6
+
+    t = np.linspace(0, n_points, resolution)
+    segment = np.minimum(np.floor(t).astype(np.int64), n_points - 1)
+    weights = _basis(t - segment)
+
+    evaluation = np.zeros((resolution, n_points))
+    for offset in range(4):
+        np.add.at(evaluation, (np.arange(resolution), (segment + offset - 1) % n_points), weights[:, offset])
+
+    matrix = evaluation @ np.linalg.inv(interpolation)
+    matrix.flags.writeable = False
+    return matrix
+
+
+def smooth_closed_curves(xx, yy, resolution: int, closed_input: bool = True):
+    """
+    Smooth a batch of closed outlines.
+
+    `xx` and `yy` have shape (..., n); every outline in the batch is smoothed by the same matrix
+    multiply and the result has shape (..., resolution). With `closed_input` the last vertex only
+    closes the outline and is ignored, as splprep(per=True) ignores it.
+    """
+    xx = np.asarray(xx, dtype=float)
+    yy = np.asarray(yy, dtype=float)
+    if closed_input:
+        xx = xx[..., :-1]
+        yy = yy[..., :-1]
+
+    matrix = closed_curve_matrix(xx.shape[-1], resolution)
+    return xx @ matrix.T, yy @ matrix.T
+
+
+def resample_closed_curve(xx, yy, tolerance: float, max_segment: float = None, oversample: int = 8,
+                          min_points: int = 8, max_refinements: int = 8):
+    """
+    Adaptive resampling of a closed outline (last vertex equal to the first).
+
+    The outline is refined with the interpolating periodic spline through its vertices, then
+    points are spaced by curvature: an arc of curvature k drawn as chords of length L strays about
+    k L^2 / 8 from the curve, so chords are kept under sqrt(8 tolerance / k). Straight stretches get
+    few points and tight bends many; `max_segment` caps chord length on straights. Chords that
+    still stray further than `tolerance` from the refined curve, allowing for how far the curve
+    bows out between refined samples, are then split. The result is closed like the input.
+    """
+    xx = np.asarray(xx, dtype=float)[:-1]
+    yy = np.asarray(yy, dtype=float)[:-1]
+    n_points = len(xx)
+    dense_x, dense_y = smooth_closed_curves(xx, yy, n_points * oversample + 1, closed_input=False)
+
+    # curvature at every dense sample from the turning angle between its neighbouring chords
+    dx, dy = np.diff(dense_x), np.diff(dense_y)
+    chord = np.hypot(dx, dy)
+    heading = np.arctan2(dy, dx)
+    turn = np.abs(np.angle(np.exp(1j * (heading - np.roll(heading, 1)))))
+    curvature = turn / np.maximum(0.5 * (chord + np.roll(chord, 1)), 1e-12)
+
+    # points per yard needed at each chord, integrated along the outline
+    chord_curvature = np.maximum(curvature, np.roll(curvature, -1))
+    density = np.sqrt(chord_curvature / (8 * tolerance))
+    if max_segment is not None:
+        density = np.maximum(density, 1 / max_segment)
+    budget = np.concatenate([[0], np.cumsum(density * chord)])
+
+    n_out = max(int(np.ceil(budget[-1])), min_points)
+    samples = np.arange(len(dense_x))
+    index = np.interp(np.linspace(0, budget[-1], n_out + 1), budget, samples)
+
+    # The estimate ignores how curvature varies along a chord; split the chords that still stray.
+    # Between two dense samples the curve itself bows out from their chord by up to k L^2 / 8, so
+    # that is added to the larger of their distances to the output chord
+    bow = chord_curvature * chord * chord / 8
+    for _ in range(max_refinements):
+        out_x, out_y = np.interp(index, samples, dense_x), np.interp(index, samples, dense_y)
+        segment = np.clip(np.searchsorted(index, samples, side='right') - 1, 0, len(index) - 2)
+        x0, y0 = out_x[segment], out_y[segment]
+        sx, sy = out_x[segment + 1] - x0, out_y[segment + 1] - y0
+        length2 = np.maximum(sx * sx + sy * sy, 1e-12)
+        t = np.clip(((dense_x - x0) * sx + (dense_y - y0) * sy) / length2, 0, 1)
+        distance = np.hypot(dense_x - x0 - t * sx, dense_y - y0 - t * sy)
+        dense_error = np.maximum(distance[:-1], distance[1:]) + bow
+        error = np.zeros(len(index) - 1)
+        np.maximum.at(error, segment[:-1], dense_error)
+        np.maximum.at(error, segment[1:], dense_error)
+
+        split = error > tolerance
+        if not split.any():
+            break
+        index = np.sort(np.concatenate([index, 0.5 * (index[:-1] + index[1:])[split]]))
+
+    return np.interp(index, samples, dense_x), np.interp(index, samples, dense_y)
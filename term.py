@@ -0,0 +1,137 @@
+"""
+Truecolor terminal renderer.
+
+A hole is rendered once into a pixel buffer (render.render_course). Each terminal cell shows two
+vertically stacked pixels with the upper half block glyph: the foreground colour is the top pixel
+and the background colour the bottom one. Every frame is composed as arrays and compared with the
+previous frame, and only cells that changed are written, so moving the ball or the camera costs
+bytes proportional to what actually moved on screen.
+
+    python term.py
+"""
+import shutil
+import sys
+import time
+
+import numpy as np
+
+from lie import OUT
+from render import LIE_COLORS, lie_raster, lie_raster_width, render_course
+
+HALF_BLOCK = '▀'
+BALL_COLOR = np.array([255, 255, 255], dtype=np.uint8)
+RESET = '\x1b[0m'
+
+
+class TerminalView():
+    """Viewport of `cols` x `rows` terminal cells onto one hole"""
+
+    def __init__(self, course, cols: int = 80, rows: int = 24, pixel_size: float = None):
+        self.course = course
+        self.cols = cols
+        self.rows = rows
+
+        if pixel_size is None:
+            pixel_size = lie_raster_width(course) / cols # fit the whole hole across the terminal
+        self.pixel_size = pixel_size
+
+        raster = lie_raster(course, pixel_size)
+        self.pixels = render_course(course, pixel_size, raster=raster) # precomputed cell buffer, row 0 at the top
+        self.origin = raster[1]
+        self.camera = (0, 0) # top-left pixel of the viewport
+        self.ball = None
+        self._previous = None # (top, bottom) pixels of the last frame that was written
+
+
+    def world_to_pixel(self, x, y):
+        col = int(np.floor((x - self.origin[0]) / self.pixel_size))
+        row = self.pixels.shape[0] - 1 - int(np.floor((y - self.origin[1]) / self.pixel_size))
+        return row, col
+
+
+    def center_on(self, x, y):
+        """Move the camera so that world point (x, y) is in the middle of the viewport"""
+        row, col = self.world_to_pixel(x, y)
+        self.camera = (row - self.rows, col - self.cols // 2)
+
+
+    def set_ball(self, x, y):
+        self.ball = None if x is None else (x, y)
+
+
+    def invalidate(self):
+        """Forget the last frame, so the next one is drawn in full (e.g. after a terminal resize)"""
+        self._previous = None
+
+
+    def _compose(self):
+        """(2 * rows, cols, 3) pixels currently in view"""
+        top, left = self.camera
+        rows = top + np.arange(2 * self.rows)
+        cols = left + np.arange(self.cols)
+        n_rows, n_cols = self.pixels.shape[:2]
+        valid = ((rows >= 0) & (rows < n_rows))[:, np.newaxis] & ((cols >= 0) & (cols < n_cols))[np.newaxis, :]
+
+        view = self.pixels[np.clip(rows, 0, n_rows - 1)[:, np.newaxis], np.clip(cols, 0, n_cols - 1)[np.newaxis, :]]
+        view[~valid] = LIE_COLORS[OUT]
+
+        if self.ball is not None:
+            row, col = self.world_to_pixel(*self.ball)
+            if 0 <= row - top < 2 * self.rows and 0 <= col - left < self.cols:
+                view[row - top, col - left] = BALL_COLOR
+        return view
+
+
+    def frame(self):
+        """ANSI escape sequence that brings the terminal from the previous frame to this one"""
+        view = self._compose()
+        top, bottom = view[0::2], view[1::2]
+
+        if self._previous is None:
+            changed = np.ones((self.rows, self.cols), dtype=bool)
+        else:
+            changed = (top != self._previous[0]).any(axis=2) | (bottom != self._previous[1]).any(axis=2)
+        self._previous = (top, bottom)
+
+        rows, cols = np.nonzero(changed)
+        cells = zip(rows.tolist(), cols.tolist(), top[changed].tolist(), bottom[changed].tolist())
+
+        out = []
+        cursor = None
+        colors = None
+        for row, col, fg, bg in cells:
+            if cursor != (row, col):
+                out.append(f'\x1b[{row + 1};{col + 1}H')
+            if (fg, bg) != colors:
+                out.append(f'\x1b[38;2;{fg[0]};{fg[1]};{fg[2]};48;2;{bg[0]};{bg[1]};{bg[2]}m')
+                colors = (fg, bg)
+            out.append(HALF_BLOCK)
+            cursor = (row, col + 1)
+
+        if out:
+            out.append(RESET)
+        return ''.join(out)
+
+
+def main():
+    from course_gen_v3 import CourseGenerator
+
+    size = shutil.get_terminal_size()
+    course = CourseGenerator(350, seed=1)
+    view = TerminalView(course, cols=size.columns, rows=size.lines - 1, pixel_size=1.0)
+
+    sys.stdout.write('\x1b[2J\x1b[?25l') # clear screen, hide cursor
+    try:
+        for x in np.arange(0, course.length + 1, 2.0):
+            y = float(course.center_line(x))
+            view.set_ball(x, y)
+            view.center_on(x, y)
+            sys.stdout.write(view.frame())
+            sys.stdout.flush()
+            time.sleep(1 / 30)
+    finally:
+        sys.stdout.write(RESET + '\x1b[?25h\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+import random
+from functools import cached_property
+
+import numpy as np
+
+
+def _fade(t):
+    """Quintic smoothstep used to weight lattice contributions"""
+    return t * t * t * (t * (t * 6 - 15) + 10)
+
+
+class GradientNoise():
+    """
+    Vectorized 2D gradient (Perlin) noise.
+
+    A single octave reproduces perlin_noise.PerlinNoise(frequency, seed) value for value: the
+    lattice vectors are seeded with the same `seed * hash(corner)` scheme, so existing seeds keep
+    producing the same terrain. Extra octaves are layered on top as fractal noise, each with its
+    own lattice seed.
+    """
+
+    def __init__(self, frequency: float = 1, seed: int = None, octaves: int = 1,
+                 persistence: float = 0.5, lacunarity: float = 2.0):
+        if frequency <= 0:
+            raise ValueError("frequency expected to be a positive number")
+        if octaves < 1:
+            raise ValueError("octaves expected to be at least 1")
+
+        self.frequency = frequency
+        self.seed = seed if seed else random.randint(1, 10**5) # same fallback as PerlinNoise
+        self.octaves = octaves
+        self.persistence = persistence
+        self.lacunarity = lacunarity
+
+        self._vectors = [{} for _ in range(octaves)] # (ix, iz) -> gradient, one cache per octave
+
+
+    def _lattice_vector(self, octave: int, ix: int, iz: int):
+        cache = self._vectors[octave]
+        vec = cache.get((ix, iz))
+        if vec is None:
+            corner_hash = max(1, abs(ix + 10 * iz + 1))
+            rng = random.Random((self.seed + octave) * corner_hash)
+            vec = (rng.uniform(-1, 1), rng.uniform(-1, 1))
+            cache[(ix, iz)] = vec
+        return vec
+
+
+    def _lattice(self, octave: int, ix_min: int, ix_max: int, iz_min: int, iz_max: int):
+        """Gradient table covering lattice corners [ix_min, ix_max] x [iz_min, iz_max]"""
+        table = np.empty((ix_max - ix_min + 1, iz_max - iz_min + 1, 2))
+        for ix in range(ix_min, ix_max + 1):
+            for iz in range(iz_min, iz_max + 1):
+                table[ix - ix_min, iz - iz_min] = self._lattice_vector(octave, ix, iz)
+        return table
+
+
+    def _octave(self, octave: int, xs, zs):
+        frequency = self.frequency * self.lacunarity**octave
+        fx = xs * frequency
+        fz = zs * frequency
+        ix = np.floor(fx).astype(np.int64)
+        iz = np.floor(fz).astype(np.int64)
+        tx = fx - ix
+        tz = fz - iz
+
+        ix_min, iz_min = int(ix.min()), int(iz.min())
+        table = self._lattice(octave, ix_min, int(ix.max()) + 1, iz_min, int(iz.max()) + 1)
+        ix -= ix_min
+        iz -= iz_min
+
+        total = np.zeros(np.broadcast(fx, fz).shape)
+        for cx in (0, 1):
+            dx = tx - cx
+            wx = _fade(1 - np.abs(dx))
+            for cz in (0, 1):
+                dz = tz - cz
+                grad = table[ix + cx, iz + cz]
+                total += wx * _fade(1 - np.abs(dz)) * (grad[..., 0] * dx + grad[..., 1] * dz)
+        return total
+
+
+    def __call__(self, xs, zs):
+        """Noise at broadcastable coordinate arrays (roughly in [-0.5, 0.5] for one octave)"""
+        xs, zs = np.broadcast_arrays(np.asarray(xs, dtype=float), np.asarray(zs, dtype=float))
+        if xs.size == 0:
+            return np.zeros(xs.shape)
+
+        heights = np.zeros(xs.shape)
+        amplitude = 1.0
+        for octave in range(self.octaves):
+            heights += amplitude * self._octave(octave, xs, zs)
+            amplitude *= self.persistence
+        return heights
+
+
+    def grid(self, xs, zs):
+        """Noise over the grid spanned by 1D `xs` (columns) and `zs` (rows), shape (len(zs), len(xs))"""
+        xs = np.asarray(xs, dtype=float)
+        zs = np.asarray(zs, dtype=float)
+        return self(xs[np.newaxis, :], zs[:, np.newaxis])
+
+
+def _catmull_rom(t):
+    """Weights of the four neighbouring samples (i-1, i, i+1, i+2) at fraction t"""
+    t2 = t * t
+    t3 = t2 * t
+    return (
+        0.5 * (-t3 + 2 * t2 - t),
+        0.5 * (3 * t3 - 5 * t2 + 2),
+        0.5 * (-3 * t3 + 4 * t2 + t),
+        0.5 * (t3 - t2),
+    )
+
+
+class HeightField():
+    """
+    Heightmap with array-in/array-out interpolated sampling.
+
+    `heights[z, x]` is the height at world position origin + (x, z) * spacing. Positions may be
+    fractional and are clamped to the edge of the grid. The gradient field is computed once with
+    central differences on the first slope query, so slope queries are interpolated lookups as well.
+    Floating point heights are used as given (no copy), so a memory-mapped float32 grid stays mapped.
+    """
+
+    def __init__(self, heights, origin=(0.0, 0.0), spacing: float = 1.0):
+        self.heights = np.asarray(heights)
+        if not np.issubdtype(self.heights.dtype, np.floating):
+            self.heights = self.heights.astype(float)
+        if self.heights.ndim != 2 or min(self.heights.shape) < 2:
+            raise ValueError("height field needs at least 2x2 samples")
+        self.origin = origin
+        self.spacing = spacing
+
+
+    @cached_property
+    def _gradients(self):
+        return np.gradient(self.heights, self.spacing)
+
+
+    @property
+    def grad_x(self):
+        return self._gradients[1]
+
+
+    @property
+    def grad_z(self):
+        return self._gradients[0]
+
+
+    def _grid_coords(self, xs, zs):
+        xs, zs = np.broadcast_arrays(np.asarray(xs, dtype=float), np.asarray(zs, dtype=float))
+        n_rows, n_cols = self.heights.shape
+        fx = np.clip((xs - self.origin[0]) / self.spacing, 0, n_cols - 1)
+        fz = np.clip((zs - self.origin[1]) / self.spacing, 0, n_rows - 1)
+        ix = np.minimum(np.floor(fx).astype(np.int64), n_cols - 2)
+        iz = np.minimum(np.floor(fz).astype(np.int64), n_rows - 2)
+        return ix, iz, fx - ix, fz - iz
+
+
+    def _interpolate(self, field, xs, zs, order):
+        ix, iz, tx, tz = self._grid_coords(xs, zs)
+
+        if order == 1:
+            top = field[iz, ix] * (1 - tx) + field[iz, ix + 1] * tx
+            bottom = field[iz + 1, ix] * (1 - tx) + field[iz + 1, ix + 1] * tx
+            return top * (1 - tz) + bottom * tz
+
+        if order == 3:
+            n_rows, n_cols = field.shape
+            wx = _catmull_rom(tx)
+            wz = _catmull_rom(tz)
+            total = np.zeros(tx.shape)
+            for j in range(4):
+                rows = np.clip(iz + j - 1, 0, n_rows - 1)
+                row_total = np.zeros(tx.shape)
+                for i in range(4):
+                    row_total += wx[i] * field[rows, np.clip(ix + i - 1, 0, n_cols - 1)]
+                total += wz[j] * row_total
+            return total
+
+        raise ValueError("order expected to be 1 (bilinear) or 3 (bicubic)")
+
+
+    def sample(self, xs, zs, order: int = 1):
+        """Interpolated height at (xs, zs)"""
+        return self._interpolate(self.heights, xs, zs, order)
+
+
+    def gradient(self, xs, zs, order: int = 1):
+        """Interpolated (dh/dx, dh/dz) at (xs, zs)"""
+        return self._interpolate(self.grad_x, xs, zs, order), self._interpolate(self.grad_z, xs, zs, order)
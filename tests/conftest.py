@@ -0,0 +1,19 @@
+import os
+import sys
+
+import numpy as np
+
+# The library modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def assert_same_holes(holes, others):
+    """Generated holes match feature for feature and height for height"""
+    assert len(holes) == len(others)
+    for hole, other in zip(holes, others):
+        store, other_store = hole.feature_store, other.feature_store
+        np.testing.assert_array_equal(store.ftypes, other_store.ftypes)
+        np.testing.assert_array_equal(store.pos, other_store.pos)
+        np.testing.assert_array_equal(store.xx, other_store.xx)
+        np.testing.assert_array_equal(store.yy, other_store.yy)
+        np.testing.assert_array_equal(hole.height_field.heights, other.height_field.heights)
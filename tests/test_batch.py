@@ -0,0 +1,35 @@
+import itertools
+
+import numpy as np
+
+from batch import generate_courses, hole_seeds, iter_holes
+from conftest import assert_same_holes
+from course_gen_v2 import Course
+
+
+def test_same_holes_for_any_worker_count():
+    serial = generate_courses(6, seeds=11, workers=1)
+    assert_same_holes(serial, generate_courses(6, seeds=11, workers=3))
+
+
+def test_same_v2_courses_for_any_worker_count():
+    serial = generate_courses(4, seeds=2, workers=1, generator=Course, par=5, dogleg=True)
+    parallel = generate_courses(4, seeds=2, workers=2, generator=Course, par=5, dogleg=True)
+    for course, other in zip(serial, parallel):
+        np.testing.assert_array_equal(course.fairway, other.fairway)
+        np.testing.assert_array_equal(course.green, other.green)
+
+
+def test_explicit_seeds_pick_holes():
+    holes = generate_courses(3, seeds=7, workers=1)
+    seeds = hole_seeds(3, 7)
+    assert_same_holes(holes[1:], generate_courses(2, seeds=seeds[1:], workers=1))
+
+
+def test_iter_holes_matches_batches_and_leaves_seed_sequences_alone():
+    seeds = np.random.SeedSequence(9)
+    first = list(itertools.islice(iter_holes(seeds, lazy=True), 3))
+    again = list(itertools.islice(iter_holes(seeds, lazy=True), 3))
+    assert seeds.n_children_spawned == 0
+    assert_same_holes(first, again)
+    assert_same_holes(first, generate_courses(3, seeds=seeds, workers=1))
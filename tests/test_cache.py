@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from cache import CourseCache, hole_key
+from course_gen_v2 import Course
+from course_gen_v3 import CourseGenerator
+from course_io import StoredHole
+from profiling import StageCollector
+
+
+def test_memory_then_disk_hits(tmp_path):
+    cache = CourseCache(tmp_path)
+    hole = cache.get(CourseGenerator, 3, length=300)
+    assert (cache.misses, cache.hits) == (1, 0)
+    assert cache.get(CourseGenerator, 3, length=300) is hole
+    assert cache.hits == 1
+
+    cache.clear()
+    stored = cache.get(CourseGenerator, 3, length=300)
+    assert cache.disk_hits == 1
+    np.testing.assert_allclose(stored.feature_store.xx, hole.feature_store.xx, atol=1e-4)
+
+    cache.get(CourseGenerator, 4, length=300)
+    cache.get(CourseGenerator, 3, length=350)
+    assert cache.misses == 3
+
+
+def test_version_bump_retires_entries(tmp_path, monkeypatch):
+    cache = CourseCache(tmp_path)
+    cache.get(CourseGenerator, 3)
+    key = hole_key(CourseGenerator, 3, {})
+
+    monkeypatch.setattr(CourseGenerator, 'VERSION', CourseGenerator.VERSION + 1)
+    assert hole_key(CourseGenerator, 3, {}) != key
+    cache.clear()
+    cache.get(CourseGenerator, 3)
+    assert (cache.misses, cache.disk_hits) == (2, 0)
+
+
+def test_unseeded_holes_are_not_cached(tmp_path):
+    cache = CourseCache(tmp_path)
+    assert cache.get(CourseGenerator, None) is not cache.get(CourseGenerator, None)
+    assert cache.nbytes == 0
+
+
+def test_instrumented_holes_are_stored_without_the_instrument(tmp_path):
+    cache = CourseCache(tmp_path)
+    collector = StageCollector()
+    hole = cache.get(Course, 5, instrument=collector)
+    assert hole.instrument is collector and collector.records
+
+    cache.clear()
+    stored = cache.get(Course, 5)
+    assert cache.disk_hits == 1
+    assert stored.instrument is None
+    np.testing.assert_array_equal(stored.fairway, hole.fairway)
+
+
+@pytest.mark.parametrize('on_disk', [False, True])
+def test_feature_holes_are_always_read_only_stored_holes(tmp_path, on_disk):
+    cache = CourseCache(tmp_path if on_disk else None)
+    built = cache.get(CourseGenerator, 3, n_traps=2)
+    remembered = cache.get(CourseGenerator, 3, n_traps=2)
+    cache.clear()
+    reloaded = cache.get(CourseGenerator, 3, n_traps=2)
+    unseeded = cache.get(CourseGenerator, None)
+
+    for hole in (built, remembered, reloaded, unseeded):
+        assert type(hole) is StoredHole
+        assert not hole.feature_store.xx.flags.writeable
+    assert not hasattr(built, 'update')
+    with pytest.raises(ValueError):
+        remembered.feature_store.xx[0] = 0
+    np.testing.assert_array_equal(reloaded.feature_store.xx, built.feature_store.xx)
+
+
+def test_callers_cannot_edit_cached_pickled_holes(tmp_path):
+    cache = CourseCache(tmp_path)
+    built = cache.get(Course, 5)
+    fairway = np.array(built.fairway, copy=True)
+    built.fairway[0][:] = 0
+    remembered = cache.get(Course, 5)
+    remembered.fairway[1][:] = 0
+    assert cache.hits == 1
+    np.testing.assert_array_equal(cache.get(Course, 5).fairway, fairway)
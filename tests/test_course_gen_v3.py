@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from conftest import assert_same_holes
+from course_gen_v3 import CourseGenerator
+from features import FeatureType
+
+
+@pytest.mark.parametrize('order', [CourseGenerator.STAGES, CourseGenerator.STAGES[::-1], ('terrain', 'traps')])
+def test_lazy_stages_match_eager_build(order):
+    eager = CourseGenerator(seed=21, n_water=1, n_trees=2)
+    lazy = CourseGenerator(seed=21, n_water=1, n_trees=2, lazy=True)
+    for stage in order:
+        lazy._stage(stage)
+    lazy.generate()
+    assert_same_holes([lazy], [eager])
+
+
+def reference_bumps(course, xx, base_width):
+    """The per-feature loop _fairway_bumps replaced"""
+    top, bottom = np.zeros(len(xx)), np.zeros(len(xx))
+    for feature in [course.green, *course.traps]:
+        if feature.ftype == FeatureType.GREEN:
+            bump = np.exp(-(xx - feature.pos[0])**2 / (2 * 30**2))
+            top += bump * (max(feature.abs_yy) - base_width // 3)
+            bottom += bump * (min(feature.abs_yy) + base_width // 3)
+        elif feature.ftype == FeatureType.TRAP:
+            bump = np.exp(-(xx - feature.pos[0])**2 / (2 * 15**2))
+            if feature.pos[1] > course.center_line(feature.pos[0]):
+                top += bump * (max(feature.abs_yy) - base_width // 3)
+            else:
+                bottom += bump * (min(feature.abs_yy) + base_width // 3)
+    return top, bottom
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_fairway_bumps_match_per_feature_loop(seed):
+    course = CourseGenerator(seed=seed, length=250 + 60 * seed, n_traps=seed % 4, n_water=1)
+    xx = np.linspace(0, course.length + 10, course.resolution)
+    top, bottom = course._fairway_bumps(xx, [course.green, *course.traps], 30)
+    expected_top, expected_bottom = reference_bumps(course, xx, 30)
+    np.testing.assert_allclose(top, expected_top, atol=1e-9)
+    np.testing.assert_allclose(bottom, expected_bottom, atol=1e-9)
+
+
+@pytest.mark.parametrize('params, redone', [
+    ({'n_traps': 3}, {'traps', 'fairway'}),
+    ({'terrain_spacing': 4}, {'terrain'}),
+    ({'length': 420}, set(CourseGenerator.STAGES)),
+])
+def test_update_matches_fresh_build(params, redone):
+    base = dict(seed=13, n_traps=1, n_water=1)
+    course = CourseGenerator(**base)
+    terrain = course.height_field
+    stale = course.update(**params)
+    assert redone <= set(stale)
+    assert ('terrain' in stale) == ('terrain' in redone)
+    if 'terrain' not in redone:
+        assert course.height_field is terrain
+    assert_same_holes([course], [CourseGenerator(**dict(base, **params))])
+
+
+def test_update_rejects_unknown_parameters():
+    with pytest.raises(TypeError):
+        CourseGenerator(seed=1, lazy=True).update(colour='red')
@@ -0,0 +1,33 @@
+import numpy as np
+
+from course_gen_v3 import CourseGenerator
+from course_io import open_courses, write_courses
+
+
+def test_archive_round_trip(tmp_path):
+    courses = [CourseGenerator(seed=seed, n_water=seed % 2, n_trees=2) for seed in range(3)]
+    path = tmp_path / 'holes.tgolf'
+    assert write_courses(path, iter(courses), distance_fields=True) == 3
+
+    archive = open_courses(path)
+    assert len(archive) == 3
+    rng = np.random.default_rng(0)
+    for course, hole in zip(courses, archive):
+        assert hole.length == course.length
+        store, stored = course.feature_store, hole.feature_store
+        np.testing.assert_array_equal(stored.ftypes, store.ftypes)
+        np.testing.assert_array_equal(stored.offsets, store.offsets)
+        np.testing.assert_allclose(stored.xx, store.xx, atol=1e-4)
+        np.testing.assert_allclose(stored.yy, store.yy, atol=1e-4)
+        np.testing.assert_allclose(stored.pos, store.pos)
+        np.testing.assert_allclose(hole.height_field.heights, course.height_field.heights, atol=1e-5)
+
+        xs = rng.uniform(-10, course.length + 10, 2000)
+        ys = rng.uniform(-60, 60, 2000)
+        np.testing.assert_allclose(hole.center_line(xs[:50]), course.center_line(xs[:50]), atol=1e-3)
+        np.testing.assert_array_equal(hole.lie_at(xs, ys), course.lie_at(xs, ys))
+        np.testing.assert_allclose(hole.distance_fields().to_pin(xs, ys), course.distance_fields().to_pin(xs, ys))
+
+        # every array is a view into the mapped file
+        assert isinstance(stored.xx.base, np.ndarray)
+        assert isinstance(hole.lie_grid().lies.base, np.ndarray)
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from distance import DistanceFields
+from lie import FAIRWAY, ROUGH, TRAP, LieGrid
+from raster import points_in_polygon
+from spatial import _outline_distance
+
+
+def blob(cx, cy, rx, ry, n=60):
+    thetas = np.linspace(0, 2 * np.pi, n)
+    radii = 1 + 0.15 * np.sin(3 * thetas)
+    return cx + rx * radii * np.cos(thetas), cy + ry * radii * np.sin(thetas)
+
+
+class FlatHole():
+    """Straight hole with hand-placed polygons, enough for DistanceFields.from_course"""
+
+    length = 200
+
+    def __init__(self, polygons):
+        self.polygons = polygons
+
+    def center_line(self, xs):
+        return np.zeros(np.shape(xs))
+
+    def lie_grid(self, resolution):
+        return LieGrid(self.polygons, resolution=resolution)
+
+
+def brute_force_signed(polygons, lie, xs, ys):
+    """Exact signed distance to the union of the polygons of `lie` (they do not overlap)"""
+    outline = np.full(xs.shape, np.inf)
+    inside = np.zeros(xs.shape, dtype=bool)
+    for polygon_lie, xx, yy in polygons:
+        if polygon_lie == lie:
+            outline = np.minimum(outline, _outline_distance(xs, ys, xx, yy))
+            inside |= points_in_polygon(xs, ys, xx, yy)
+    return np.where(inside, -outline, outline)
+
+
+@pytest.mark.parametrize('resolution', [0.5, 1, 2])
+def test_signed_distances_match_exact_polygon_distances(resolution):
+    fairway = (FAIRWAY, np.array([0, 200, 200, 0.]), np.array([-15, -15, 15, 15.]))
+    polygons = [fairway, (TRAP, *blob(60, 28, 8, 5)), (TRAP, *blob(150, -30, 6, 9)), (TRAP, *blob(110, 2, 5, 4))]
+    fields = DistanceFields.from_course(FlatHole(polygons), resolution)
+
+    # the fields hold one value per cell, so compare at the cell centres
+    rng = np.random.default_rng(int(resolution * 10))
+    xs = fields.origin[0] + (rng.integers(0, fields.shape[1], 5000) + 0.5) * resolution
+    ys = fields.origin[1] + (rng.integers(0, fields.shape[0], 5000) + 0.5) * resolution
+
+    for lie in (TRAP, FAIRWAY):
+        expected = brute_force_signed(polygons[:1] if lie == FAIRWAY else polygons, lie, xs, ys)
+        if lie == FAIRWAY:
+            # the middle trap cuts into the fairway
+            expected = np.maximum(expected, -brute_force_signed(polygons[3:], TRAP, xs, ys))
+        np.testing.assert_allclose(fields.signed_distance(lie, xs, ys), expected, rtol=0, atol=resolution)
+    assert ROUGH in fields.signed
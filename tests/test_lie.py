@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from course_gen_v3 import CourseGenerator
+from lie import FAIRWAY, GREEN, ROUGH, LieGrid
+
+
+def random_points(grid, n, seed):
+    rng = np.random.default_rng(seed)
+    xs = rng.uniform(grid.origin[0], grid.origin[0] + grid.shape[1] * grid.resolution, n)
+    ys = rng.uniform(grid.origin[1], grid.origin[1] + grid.shape[0] * grid.resolution, n)
+    return xs, ys
+
+
+@pytest.mark.parametrize('resolution', [0.5, 1, 4, 8])
+def test_lie_at_matches_exact_polygon_test(resolution):
+    course = CourseGenerator(seed=4, n_traps=3, n_water=1, n_trees=3)
+    grid = LieGrid.from_features(course.features, resolution=resolution)
+    xs, ys = random_points(grid, 20000, seed=int(resolution * 10))
+    np.testing.assert_array_equal(grid.lie_at(xs, ys), grid._exact_lies(xs, ys))
+
+
+def test_slivers_thinner_than_a_cell_are_found():
+    polygons = [
+        (FAIRWAY, np.array([0, 100, 100, 0.]), np.array([0, 0, 0.3, 0.3])),
+        (GREEN, np.array([10, 10.2, 10.2, 10]), np.array([-50, -50, 50, 50.])),
+    ]
+    grid = LieGrid(polygons, resolution=8)
+    assert grid.lie_at(50, 0.15) == FAIRWAY
+    assert grid.lie_at(10.1, 30) == GREEN
+    assert grid.lie_at(50, 1) == ROUGH
+    xs, ys = random_points(grid, 50000, seed=1)
+    np.testing.assert_array_equal(grid.lie_at(xs, ys), grid._exact_lies(xs, ys))
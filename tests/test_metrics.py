@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from batch import build_hole
+from course_gen_v2 import Course
+from course_gen_v3 import CourseGenerator
+from features import Feature, FeatureStore, FeatureType
+from metrics import HAZARD_TYPES, _feature_store, filter_holes, hole_metrics, passes
+from raster import points_in_polygon
+
+
+class Sketch():
+    """A hole drawn by hand: features only, no center line or terrain"""
+
+    def __init__(self, features):
+        self.feature_store = FeatureStore.from_features(features)
+
+
+def circle(ftype, x, y, radius, n=40):
+    thetas = np.linspace(0, 2 * np.pi, n)
+    return Feature(ftype=ftype, xx=radius * np.cos(thetas), yy=radius * np.sin(thetas), pos=(x, y))
+
+
+@pytest.fixture(scope='module')
+def holes():
+    holes = [CourseGenerator(seed=seed, n_traps=seed % 4, n_water=seed % 2, n_trees=seed % 3) for seed in range(6)]
+    holes.append(build_hole(Course, seed=1, dogleg=True))
+    fairway = Feature(ftype=FeatureType.FAIRWAY, xx=[0, 300, 300, 0, 0], yy=[-12, -12, 12, 12, -12])
+    holes.append(Sketch([fairway, circle(FeatureType.GREEN, 300, 0, 15),
+                         circle(FeatureType.TRAP, 318, 5, 6), circle(FeatureType.WATER, 290, -14, 3),
+                         circle(FeatureType.TREES, 200, 40, 8)]))
+    return holes
+
+
+def outlines(hole):
+    store = _feature_store(hole)
+    for i, feature in enumerate(store):
+        yield store.ftypes[i], feature.xx + store.pos[i, 0], feature.yy + store.pos[i, 1]
+
+
+def reference_metrics(hole):
+    """The metrics of one hole, one feature and one fairway column at a time"""
+    areas = {}
+    for ftype, xx, yy in outlines(hole):
+        area = 0.5 * abs(np.dot(xx, np.roll(yy, -1)) - np.dot(np.roll(xx, -1), yy))
+        areas[ftype] = areas.get(ftype, 0) + area
+    hazard_area = sum(areas.get(ftype, 0) for ftype in HAZARD_TYPES)
+
+    fairway_xx, fairway_yy = next((xx, yy) for ftype, xx, yy in outlines(hole) if ftype == FeatureType.FAIRWAY)
+    widths = []
+    x0, y0, x1, y1 = fairway_xx, fairway_yy, np.roll(fairway_xx, -1), np.roll(fairway_yy, -1)
+    for x in fairway_xx.min() + (fairway_xx.max() - fairway_xx.min()) * np.linspace(0.1, 0.9, 64):
+        crossing = (x0 <= x) != (x1 <= x)
+        ys = y0[crossing] + (x - x0[crossing]) * (y1[crossing] - y0[crossing]) / (x1[crossing] - x0[crossing])
+        widths.append(ys.max() - ys.min() if len(ys) else 0)
+
+    green = next(((xx, yy) for ftype, xx, yy in outlines(hole) if ftype == FeatureType.GREEN), None)
+    on_green = sum(points_in_polygon(xx, yy, *green).any() or points_in_polygon(*green, xx, yy).any()
+                   for ftype, xx, yy in outlines(hole) if ftype in HAZARD_TYPES)
+
+    dogleg = np.nan
+    if getattr(hole, 'center_line', None) is not None:
+        xs = np.linspace(max(fairway_xx.min(), 0), fairway_xx.max(), 64)
+        ys = np.asarray(hole.center_line(xs), dtype=float)
+        dogleg = np.abs(ys - np.interp(xs, xs[[0, -1]], ys[[0, -1]])).max()
+
+    height_field = getattr(hole, 'height_field', None)
+    return {
+        'fairway_area': areas[FeatureType.FAIRWAY],
+        'green_area': areas.get(FeatureType.GREEN, 0),
+        'hazard_area': hazard_area,
+        'hazard_coverage': hazard_area / areas[FeatureType.FAIRWAY],
+        'min_corridor_width': min(widths),
+        'hazards_on_green': on_green,
+        'dogleg_offset': dogleg,
+        'elevation_variance': np.var(height_field.heights, dtype=float) if height_field is not None else np.nan,
+    }
+
+
+def test_batched_metrics_match_one_hole_at_a_time(holes):
+    metrics = hole_metrics(holes)
+    assert metrics['hazards_on_green'][-1] == 2
+    assert metrics['dogleg_offset'][-2] > 0
+    for k, hole in enumerate(holes):
+        for name, expected in reference_metrics(hole).items():
+            assert metrics[name][k] == pytest.approx(expected, rel=1e-9, nan_ok=True), name
+
+
+def test_filter_holes_keeps_what_passes_one_hole_at_a_time(holes):
+    constraints = {'hazard_coverage': (None, 0.08), 'green_area': (700, None)}
+    expected = [hole for hole in holes if passes(hole_metrics([hole]), constraints)[0]]
+    kept = list(filter_holes(iter(holes), constraints, batch_size=3))
+    assert 0 < len(kept) < len(holes)
+    assert [hole for hole, _ in kept] == expected
+    for hole, values in kept:
+        assert values == pytest.approx(reference_metrics(hole), rel=1e-9, nan_ok=True)
@@ -0,0 +1,31 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from course_gen_v3 import CourseGenerator
+from raster import points_in_polygon
+from spatial import _outline_distance, _segments_cross
+
+
+def polygon_gap(ax, ay, bx, by):
+    """Exact distance between two closed polygons, 0 when they touch or overlap"""
+    # Outlines repeat their first point; a zero-length closing edge would "cross" everything
+    ax, ay, bx, by = ax[:-1], ay[:-1], bx[:-1], by[:-1]
+    if points_in_polygon(ax, ay, bx, by).any() or points_in_polygon(bx, by, ax, ay).any():
+        return 0.0
+    if _segments_cross(ax, ay, np.roll(ax, -1), np.roll(ay, -1), bx, by).any():
+        return 0.0
+    return min(_outline_distance(ax, ay, bx, by).min(), _outline_distance(bx, by, ax, ay).min())
+
+
+@pytest.mark.parametrize('clearance', [0, 0.5, 2])
+def test_hazards_keep_their_clearance(clearance):
+    for seed in range(20):
+        course = CourseGenerator(seed=seed, n_traps=10, n_water=3, n_trees=15, hazard_clearance=clearance)
+        for a, b in itertools.combinations(course.traps, 2):
+            # Only outlines whose bounding boxes come within the clearance can be too close
+            box_gap = np.hypot(max(a.abs_xx.min() - b.abs_xx.max(), b.abs_xx.min() - a.abs_xx.max(), 0),
+                               max(a.abs_yy.min() - b.abs_yy.max(), b.abs_yy.min() - a.abs_yy.max(), 0))
+            if box_gap <= clearance:
+                assert polygon_gap(a.abs_xx, a.abs_yy, b.abs_xx, b.abs_yy) >= clearance
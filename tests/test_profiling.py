@@ -0,0 +1,40 @@
+import time
+
+import numpy as np
+
+from course_gen_v3 import CourseGenerator
+from profiling import StageCollector, count_fits, run_stage, spline_fits
+
+
+def test_nested_stages_are_not_counted_twice():
+    collector = StageCollector()
+    fit = count_fits(lambda: None)
+
+    def inner():
+        fit()
+        time.sleep(0.05)
+        return np.zeros(8)
+
+    def outer():
+        run_stage(collector, collector, 'inner', inner)
+        fit()
+        time.sleep(0.01)
+
+    run_stage(collector, collector, 'outer', outer)
+    records = {record.stage: record for record in collector.records}
+    assert records['inner'].spline_fits == records['outer'].spline_fits == 1
+    assert records['inner'].wall_time >= 0.05
+    assert 0.01 <= records['outer'].wall_time < 0.04
+
+
+def test_lazy_stage_records_add_up_to_the_build():
+    collector = StageCollector()
+    fits = spline_fits.count
+    start = time.perf_counter()
+    course = CourseGenerator(seed=5, n_traps=2, lazy=True, instrument=collector)
+    course._stage('fairway') # pulls the center line, green and traps in as it runs
+    elapsed = time.perf_counter() - start
+
+    assert {record.stage for record in collector.records} >= {'center_line', 'green', 'traps', 'fairway'}
+    assert sum(record.spline_fits for record in collector.records) == spline_fits.count - fits
+    assert sum(record.wall_time for record in collector.records) <= elapsed
@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+import pytest
+
+from service import CourseService
+
+
+class SleepyHole():
+    """Stand-in generator whose build takes `duration` seconds"""
+    VERSION = 1
+
+    def __init__(self, seed=None, rng=None, duration: float = 0.0):
+        self.seed = seed
+        self.duration = duration
+
+
+    def generate(self):
+        time.sleep(self.duration)
+
+
+def test_timed_out_build_keeps_its_worker_until_it_finishes():
+    async def burst():
+        async with CourseService(workers=1, timeout=0.3, generator=SleepyHole, in_process=True) as service:
+            slow = asyncio.ensure_future(service.generate(0, duration=1.0))
+            await asyncio.sleep(0.05)
+            fast = [asyncio.ensure_future(service.generate(seed, duration=0.05)) for seed in (1, 2, 3)]
+
+            with pytest.raises(asyncio.TimeoutError):
+                await slow
+            # the abandoned build still occupies the only worker
+            assert service.metrics()['running'] == 1
+
+            holes = await asyncio.gather(*fast)
+            return holes, service.metrics()
+
+    holes, metrics = asyncio.run(burst())
+    assert [hole.seed for hole in holes] == [1, 2, 3]
+    assert metrics['timeouts'] == 1
+    assert metrics['builds'] == 3
+    assert metrics['running'] == 0
+
+
+def test_close_fails_builds_still_waiting_for_a_worker():
+    async def burst():
+        service = await CourseService(workers=1, generator=SleepyHole, in_process=True).start()
+        running = asyncio.ensure_future(service.generate(0, duration=0.2))
+        await asyncio.sleep(0.05)
+        waiting = [asyncio.ensure_future(service.generate(seed, duration=0.0)) for seed in (1, 2)]
+        await asyncio.sleep(0.01)
+        await service.close()
+        results = await asyncio.gather(running, *waiting, return_exceptions=True)
+        return results, service.metrics()
+
+    (hole, *waiting), metrics = asyncio.run(burst())
+    assert hole.seed == 0
+    for error in waiting:
+        assert isinstance(error, RuntimeError) and 'closed' in str(error)
+    assert metrics['builds'] == 1
+    assert metrics['failures'] == 2
+    assert metrics['running'] == 0
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from lie import FAIRWAY, GREEN, TRAP, LieGrid
+from sim import GRAVITY, LIE_FRICTION, simulate_shots
+
+
+def flat_course(lie):
+    return LieGrid([(lie, np.array([-200, 200, 200, -200.]), np.array([-200, -200, 200, 200.]))], resolution=4)
+
+
+@pytest.mark.parametrize('lie', [GREEN, FAIRWAY])
+def test_putt_rolls_as_far_as_friction_allows(lie):
+    speed = np.array([2, 5, 8.])
+    dt = 0.005
+    result = simulate_shots(flat_course(lie), speed, 0.0, 0.0, dt=dt)
+    np.testing.assert_array_equal(result.landing_xs, 0)
+    np.testing.assert_array_equal(result.flight_time, 0)
+    expected = speed**2 / (2 * LIE_FRICTION[lie] * GRAVITY)
+    # Explicit steps lose about half a step of travel
+    np.testing.assert_allclose(result.final_xs, expected, rtol=0, atol=speed.max() * dt)
+    np.testing.assert_allclose(result.final_ys, 0, atol=1e-9)
+
+
+def test_ground_shots_skip_the_landing_factor():
+    # A trap keeps none of a landing ball's speed, but a ball struck along the sand still rolls
+    course = flat_course(TRAP)
+    result = simulate_shots(course, 8.0, [0.0, -0.1, 0.3], np.pi / 2)
+    putt, chop, chip = result.final_ys - result.landing_ys
+    assert putt == pytest.approx(64 / (2 * LIE_FRICTION[TRAP] * GRAVITY), abs=8 * 0.02)
+    assert chop > 0
+    assert chip == 0
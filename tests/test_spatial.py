@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from course_gen_v3 import CourseGenerator
+from features import FeatureType
+from raster import points_in_polygon
+from spatial import _outline_distance, _segments_cross
+
+
+@pytest.fixture(scope='module')
+def index():
+    return CourseGenerator(seed=3, n_traps=4, n_water=2, n_trees=8).spatial_index
+
+
+@pytest.fixture(scope='module')
+def queries(index):
+    rng = np.random.default_rng(0)
+    length = index.bounds[:, 2].max()
+    xs = rng.uniform(-60, length + 60, 1500)
+    ys = rng.uniform(-100, 100, 1500)
+    return xs, ys, xs + rng.normal(0, 80, 1500), ys + rng.normal(0, 30, 1500)
+
+
+def brute_force(index, xs, ys, x1, y1, ftypes):
+    """(inside, crossing, distance) of every (query, feature) pair"""
+    selected = index._selected(ftypes)
+    inside = np.zeros((len(xs), len(index)), dtype=bool)
+    crossing = np.zeros_like(inside)
+    distance = np.full(inside.shape, np.inf)
+    for i in np.flatnonzero(selected):
+        inside[:, i] = points_in_polygon(xs, ys, *index.outlines[i])
+        crossing[:, i] = inside[:, i] | _segments_cross(xs, ys, x1, y1, *index.outlines[i]).any(axis=1)
+        distance[:, i] = np.where(inside[:, i], 0, _outline_distance(xs, ys, *index.outlines[i]))
+    return inside, crossing, distance
+
+
+@pytest.mark.parametrize('ftypes', [None, [FeatureType.TRAP, FeatureType.WATER]])
+def test_queries_match_brute_force(index, queries, ftypes):
+    xs, ys, x1, y1 = queries
+    inside, crossing, distance = brute_force(index, xs, ys, x1, y1, ftypes)
+    np.testing.assert_array_equal(index.contains(xs, ys, ftypes), inside)
+    np.testing.assert_array_equal(index.crosses(xs, ys, x1, y1, ftypes), crossing)
+
+    for k in (1, 3, len(index) + 2):
+        indices, distances = index.nearest(xs, ys, k, ftypes)
+        order = np.argsort(distance, axis=1, kind='stable')[:, :k]
+        expected = np.take_along_axis(distance, order, axis=1)
+        missing = k - expected.shape[1]
+        order = np.pad(order, ((0, 0), (0, missing)), constant_values=-1)
+        expected = np.pad(expected, ((0, 0), (0, missing)), constant_values=np.inf)
+        order[np.isinf(expected)] = -1
+        np.testing.assert_allclose(distances, expected)
+        np.testing.assert_array_equal(indices, order)
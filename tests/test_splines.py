@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from scipy.interpolate import splev, splprep
+
+from course_gen_v3 import CourseGenerator
+from features import LOD_TOLERANCES
+from spatial import _outline_distance
+from splines import closed_curve_matrix, smooth_closed_curves
+
+
+@pytest.mark.parametrize('n_points, resolution', [(5, 40), (16, 100), (33, 257)])
+def test_matrix_matches_periodic_splprep(n_points, resolution):
+    rng = np.random.default_rng(n_points)
+    thetas = np.linspace(0, 2 * np.pi, n_points, endpoint=False)
+    radii = 10 + rng.uniform(-3, 3, n_points)
+    xx = np.append(radii * np.cos(thetas), radii[0])
+    yy = np.append(radii * np.sin(thetas), 0)
+
+    # the matrix spline uses a uniform parameter, so give splprep the same one
+    tck, _ = splprep([xx, yy], u=np.linspace(0, 1, n_points + 1), s=0, per=True)
+    expected_x, expected_y = splev(np.linspace(0, 1, resolution), tck)
+
+    smooth_x, smooth_y = smooth_closed_curves(xx, yy, resolution)
+    np.testing.assert_allclose(smooth_x, expected_x, rtol=0, atol=1e-12)
+    np.testing.assert_allclose(smooth_y, expected_y, rtol=0, atol=1e-12)
+
+
+def test_batches_match_one_outline_at_a_time():
+    rng = np.random.default_rng(0)
+    xx, yy = rng.normal(size=(2, 6, 12))
+    smooth_x, smooth_y = smooth_closed_curves(xx, yy, 50, closed_input=False)
+    for i in range(len(xx)):
+        np.testing.assert_allclose(smooth_x[i], closed_curve_matrix(12, 50) @ xx[i], atol=1e-12)
+        np.testing.assert_allclose(smooth_y[i], closed_curve_matrix(12, 50) @ yy[i], atol=1e-12)
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_levels_of_detail_stay_within_tolerance(seed):
+    course = CourseGenerator(seed=seed, n_traps=3, n_water=1, n_trees=3)
+    for tolerance in LOD_TOLERANCES:
+        lod = course.level_of_detail(tolerance)
+        assert len(lod.xx) < len(course.feature_store.xx)
+        for feature, resampled in zip(course.feature_store, lod):
+            # the spline through the full-detail vertices, sampled far finer than the resampler does
+            dense_x, dense_y = smooth_closed_curves(feature.xx, feature.yy, (len(feature.xx) - 1) * 128 + 1)
+            error = _outline_distance(dense_x, dense_y, resampled.xx, resampled.yy)
+            assert error.max() <= tolerance
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from terrain import GradientNoise, HeightField
+
+
+@pytest.mark.parametrize('seed', [1, 67, 9001])
+def test_single_octave_matches_perlin_noise(seed):
+    PerlinNoise = pytest.importorskip('perlin_noise').PerlinNoise
+    xs = np.linspace(-0.7, 3.1, 23)
+    zs = np.linspace(-0.4, 1.6, 11)
+
+    expected = PerlinNoise(4, seed)
+    expected = np.array([[expected([x, z]) for x in xs] for z in zs])
+    np.testing.assert_allclose(GradientNoise(frequency=4, seed=seed).grid(xs, zs), expected, atol=1e-12)
+
+
+def test_octaves_are_deterministic_and_add_detail():
+    xs = np.linspace(0, 2, 50)
+    one = GradientNoise(frequency=4, seed=5).grid(xs, xs)
+    three = GradientNoise(frequency=4, seed=5, octaves=3).grid(xs, xs)
+    np.testing.assert_array_equal(three, GradientNoise(frequency=4, seed=5, octaves=3).grid(xs, xs))
+    assert not np.allclose(one, three)
+
+
+def test_height_field_interpolates_between_samples():
+    heights = np.arange(12, dtype=float).reshape(3, 4) # h = x + 4 z
+    field = HeightField(heights, origin=(10.0, 20.0), spacing=2.0)
+    np.testing.assert_allclose(field.sample([10.0, 13.0, 14.0], [20.0, 21.0, 24.0]), [0.0, 3.5, 10.0])
+    np.testing.assert_allclose(field.gradient(13.0, 21.0), (0.5, 2.0))
@@ -0,0 +1,293 @@
+"""
+Multi-hole layouts on one shared world.
+
+Terrain is a single noise field over world coordinates, generated lazily in fixed-size square
+tiles. Tiles are kept in an LRU cache and evicted beyond `max_tiles`, so memory follows the area
+being looked at, not the size of the course. Neighbouring tiles share their edge samples, so the
+terrain is continuous across tile seams and between holes.
+
+Holes are CourseGenerator holes in their own frame (tee at the origin, playing along +x) placed in
+the world with a rotation and a translation. A hole is generated the first time it is needed and
+its terrain is read from the shared tiles, so walking from one hole to the next never regenerates
+the world.
+
+    world = World(seed=1)
+    hole = world.hole(0)         # a CourseGenerator-like hole with shared terrain
+    world.hole_at(x, y)          # which hole a world position belongs to
+"""
+from collections import OrderedDict
+from functools import cached_property
+
+import numpy as np
+
+from course_gen_v3 import CourseGenerator
+from terrain import GradientNoise, HeightField
+
+# A par 4 front and back nine; longer layouts repeat it
+PARS = (4, 4, 3, 5, 4, 4, 3, 4, 5, 4, 3, 4, 5, 4, 4, 3, 5, 4)
+PAR_LENGTHS = {3: 150, 4: 350, 5: 550}
+
+
+class TerrainTiles():
+    """
+    World heightmap generated in tiles of `tile_size` x `tile_size` cells of `spacing` yards.
+
+    Uses the same noise settings as CourseGenerator's per-hole terrain, but evaluated in world
+    coordinates, so every hole placed on the world sees one continuous surface.
+    """
+
+    def __init__(self, seed: int = None, tile_size: int = 64, spacing: float = 2, max_tiles: int = 64,
+                 scale: float = 100, amplitude: float = 3, octaves: int = 2):
+        self.noise = GradientNoise(frequency=4, seed=seed, octaves=octaves)
+        self.tile_size = tile_size
+        self.spacing = spacing
+        self.max_tiles = max_tiles
+        self.scale = scale # larger = smoother terrain
+        self.amplitude = amplitude # yards
+        self._tiles = OrderedDict() # (i, j) -> HeightField, least recently used first
+        self.loads = 0
+        self.evictions = 0
+
+
+    @property
+    def extent(self):
+        """Side of one tile in yards"""
+        return self.tile_size * self.spacing
+
+
+    def __len__(self):
+        return len(self._tiles)
+
+
+    def tile(self, i: int, j: int):
+        """HeightField of tile (i, j), covering [i, i + 1) x [j, j + 1) tile extents"""
+        key = (i, j)
+        if key in self._tiles:
+            self._tiles.move_to_end(key)
+            return self._tiles[key]
+
+        # tile_size + 1 samples per side: the last row and column are the next tile's first ones
+        steps = np.arange(self.tile_size + 1)
+        xs = (i * self.tile_size + steps) * self.spacing
+        ys = (j * self.tile_size + steps) * self.spacing
+        heights = (self.noise.grid(xs / self.scale, ys / self.scale) * self.amplitude).astype(np.float32)
+
+        field = HeightField(heights, origin=(xs[0], ys[0]), spacing=self.spacing)
+        self._tiles[key] = field
+        self.loads += 1
+        while len(self._tiles) > self.max_tiles:
+            self._tiles.popitem(last=False)
+            self.evictions += 1
+        return field
+
+
+    def _tile_index(self, xs, ys):
+        return (np.floor(np.asarray(xs, dtype=float) / self.extent).astype(np.int64),
+                np.floor(np.asarray(ys, dtype=float) / self.extent).astype(np.int64))
+
+
+    def tiles_in(self, bounds):
+        """(i, j) of every tile overlapping bounds = (min_x, min_y, max_x, max_y)"""
+        (i0, i1), (j0, j1) = self._tile_index(bounds[0::2], bounds[1::2])
+        return [(i, j) for j in range(j0, j1 + 1) for i in range(i0, i1 + 1)]
+
+
+    def sample(self, xs, ys):
+        """Bilinear height at world positions (xs, ys), loading the tiles they fall in"""
+        xs, ys = np.broadcast_arrays(np.asarray(xs, dtype=float), np.asarray(ys, dtype=float))
+        ti, tj = self._tile_index(xs, ys)
+        heights = np.empty(xs.shape)
+
+        keys, inverse = np.unique(np.stack([ti.ravel(), tj.ravel()], axis=1), axis=0, return_inverse=True)
+        inverse = inverse.reshape(xs.shape)
+        for k, (i, j) in enumerate(keys):
+            points = inverse == k
+            heights[points] = self.tile(int(i), int(j)).sample(xs[points], ys[points])
+        return heights
+
+
+    def height_field(self, bounds):
+        """One HeightField over bounds = (min_x, min_y, max_x, max_y), stitched from the tiles"""
+        (i0, i1), (j0, j1) = self._tile_index(bounds[0::2], bounds[1::2])
+        n = self.tile_size
+        heights = np.empty(((j1 - j0 + 1) * n + 1, (i1 - i0 + 1) * n + 1), dtype=np.float32)
+        for i, j in self.tiles_in(bounds):
+            row, col = (j - j0) * n, (i - i0) * n
+            heights[row:row + n + 1, col:col + n + 1] = self.tile(i, j).heights
+        return HeightField(heights, origin=(i0 * self.extent, j0 * self.extent), spacing=self.spacing)
+
+
+def _segment_distance(a0, a1, b0, b1):
+    """Distance between segment a0-a1 and each segment b0[k]-b1[k] (points are (..., 2) arrays)"""
+    def point_distance(p, s0, s1):
+        d = s1 - s0
+        length2 = np.maximum((d * d).sum(axis=-1), 1e-12)
+        t = np.clip(((p - s0) * d).sum(axis=-1) / length2, 0, 1)
+        return np.hypot(*np.moveaxis(p - (s0 + t[..., np.newaxis] * d), -1, 0))
+
+    def side(s0, s1, p):
+        return np.sign((s1[..., 0] - s0[..., 0]) * (p[..., 1] - s0[..., 1]) - (s1[..., 1] - s0[..., 1]) * (p[..., 0] - s0[..., 0]))
+
+    crossing = (side(a0, a1, b0) * side(a0, a1, b1) < 0) & (side(b0, b1, a0) * side(b0, b1, a1) < 0)
+    distance = np.minimum.reduce([point_distance(a0, b0, b1), point_distance(a1, b0, b1),
+                                  point_distance(b0, a0, a1), point_distance(b1, a0, a1)])
+    return np.where(crossing, 0, distance)
+
+
+class WorldHole():
+    """
+    A CourseGenerator hole placed on a World. It keeps the hole's own frame for every query
+    (features, lie_at, center_line, ...), but its height_field is cut from the world terrain.
+    """
+
+    def __init__(self, course: CourseGenerator, tiles: TerrainTiles, tee, heading: float):
+        self.course = course
+        self.tiles = tiles
+        self.tee = np.asarray(tee, dtype=float)
+        self.heading = heading # radians from the world +x axis
+        self._rotation = np.array([[np.cos(heading), -np.sin(heading)], [np.sin(heading), np.cos(heading)]])
+
+
+    def __getattr__(self, name):
+        # Everything but placement and terrain is the hole's own
+        if name == 'course' or name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.course, name)
+
+
+    def to_world(self, xs, ys):
+        xs, ys = np.asarray(xs, dtype=float), np.asarray(ys, dtype=float)
+        (a, b), (c, d) = self._rotation
+        return self.tee[0] + a * xs + b * ys, self.tee[1] + c * xs + d * ys
+
+
+    def to_local(self, xs, ys):
+        dx, dy = np.asarray(xs, dtype=float) - self.tee[0], np.asarray(ys, dtype=float) - self.tee[1]
+        (a, b), (c, d) = self._rotation
+        return a * dx + c * dy, b * dx + d * dy
+
+
+    @cached_property
+    def height_field(self):
+        """World terrain resampled onto a grid in the hole's frame"""
+        margin = 30 # terrain extends past the outermost feature
+        spacing = self.tiles.spacing
+        min_x, min_y = self.course.feature_store.bounds()[:, :2].min(axis=0) - margin
+        max_x, max_y = self.course.feature_store.bounds()[:, 2:].max(axis=0) + margin
+
+        xx = np.arange(min_x, max_x + spacing, spacing)
+        yy = np.arange(min_y, max_y + spacing, spacing)
+        world_xs, world_ys = self.to_world(xx[np.newaxis, :], yy[:, np.newaxis])
+        heights = self.tiles.sample(world_xs, world_ys).astype(np.float32)
+        return HeightField(heights, origin=(xx[0], yy[0]), spacing=spacing)
+
+
+class World():
+    """
+    `n_holes` holes laid out tee to green around a shared terrain.
+
+    The routing (where each hole starts and which way it plays) is decided up front from the seed
+    without generating any hole. Each hole is generated on first access from its own seed, and at
+    most `max_holes` generated holes are kept, so a hole evicted and visited again is identical.
+    """
+
+    def __init__(self, n_holes: int = 18, seed: int = None, tiles: TerrainTiles = None,
+                 walk: float = 40, corridor: float = 60, max_holes: int = 4, **params):
+        # the world picks each hole's length and seed, and builds holes lazily so their own terrain
+        # stage, replaced by the shared tiles, never runs
+        reserved = sorted({'length', 'seed', 'rng', 'lazy'} & params.keys())
+        if reserved:
+            raise TypeError(f"World sets {', '.join(reserved)} for every hole itself")
+        sequence = np.random.SeedSequence(seed)
+        layout_seed, terrain_seed, *hole_seeds = sequence.spawn(n_holes + 2)
+        rng = np.random.default_rng(layout_seed)
+
+        self.n_holes = n_holes
+        if tiles is None:
+            # 1..99999 like the generators' terrain seeds: GradientNoise takes 0 as "no seed" and picks one at random
+            tiles = TerrainTiles(seed=int(terrain_seed.generate_state(1)[0] % (10**5 - 1)) + 1)
+        self.tiles = tiles
+        self.walk = walk # yards from a green to the next tee
+        self.corridor = corridor # minimum distance between the center lines of two holes
+        self.max_holes = max_holes
+        self.params = params # passed to every CourseGenerator
+        self.hole_seeds = hole_seeds
+        self.pars = [PARS[i % len(PARS)] for i in range(n_holes)]
+        self.lengths = [PAR_LENGTHS[par] + int(rng.integers(-20, 21)) for par in self.pars]
+        self.tees, self.greens, self.headings = self._route(rng)
+        self._holes = OrderedDict() # index -> WorldHole, least recently used first
+
+
+    def _route(self, rng: np.random.Generator, attempts: int = 48):
+        """Tee position, green position and heading of every hole, keeping each hole clear of the earlier ones"""
+        tees = np.zeros((self.n_holes, 2))
+        headings = np.zeros(self.n_holes)
+        greens = np.zeros((self.n_holes, 2))
+
+        for i, length in enumerate(self.lengths):
+            if i == 0:
+                candidates = rng.uniform(-np.pi, np.pi, attempts)
+                starts = np.zeros((attempts, 2))
+            else:
+                # walk off the last green, then turn somewhere between a dogleg and a U-turn
+                walk_heading = headings[i - 1] + rng.uniform(-np.pi / 2, np.pi / 2, attempts)
+                starts = greens[i - 1] + self.walk * np.column_stack([np.cos(walk_heading), np.sin(walk_heading)])
+                candidates = headings[i - 1] + rng.uniform(-np.pi, np.pi, attempts)
+            ends = starts + length * np.column_stack([np.cos(candidates), np.sin(candidates)])
+
+            # clearance of every candidate to every earlier hole except the one it walks off
+            clearance = np.full(attempts, np.inf)
+            for k in range(i - 1):
+                clearance = np.minimum(clearance, _segment_distance(tees[k], greens[k], starts, ends))
+            best = np.argmax(clearance >= self.corridor) if (clearance >= self.corridor).any() else np.argmax(clearance)
+
+            tees[i], greens[i], headings[i] = starts[best], ends[best], candidates[best]
+        return tees, greens, headings
+
+
+    def hole(self, i: int):
+        """Hole i as a WorldHole, generated on first access"""
+        if i < 0:
+            i += self.n_holes
+        if not 0 <= i < self.n_holes:
+            raise IndexError(i)
+        if i in self._holes:
+            self._holes.move_to_end(i)
+            return self._holes[i]
+
+        course = CourseGenerator(self.lengths[i], rng=np.random.default_rng(self.hole_seeds[i]), lazy=True, **self.params)
+        course.feature_store # every stage but the per-hole terrain, which the world replaces
+        hole = WorldHole(course, self.tiles, self.tees[i], self.headings[i])
+        self._holes[i] = hole
+        while len(self._holes) > self.max_holes:
+            self._holes.popitem(last=False)
+        return hole
+
+
+    def __len__(self):
+        return self.n_holes
+
+
+    def __getitem__(self, i):
+        return self.hole(i)
+
+
+    def __iter__(self):
+        return (self.hole(i) for i in range(self.n_holes))
+
+
+    def hole_at(self, x: float, y: float):
+        """Index of the hole whose tee-to-green line is closest to world position (x, y)"""
+        point = np.array([x, y], dtype=float)
+        return int(np.argmin(_segment_distance(point, point, self.tees, self.greens)))
+
+
+    def height_at(self, xs, ys):
+        """World terrain height at world positions"""
+        return self.tiles.sample(xs, ys)
+
+
+    def bounds(self, margin: float = 100):
+        """(min_x, min_y, max_x, max_y) around every hole's tee and green"""
+        points = np.concatenate([self.tees, self.greens])
+        return (*(points.min(axis=0) - margin), *(points.max(axis=0) + margin))